@@ -1,6 +1,8 @@
 from flask import Flask
 from flask_cors import CORS
 from utils.json_provider import CustomJSON
+from utils.reminders import start_scheduler
+from chat import warm_up, resource_report
 import logging
 import os
 
@@ -16,6 +18,8 @@ from routes.health_records import health_records_bp
 from routes.vaccinations import vaccinations_bp
 from routes.settings import settings_bp
 from routes.baby_growth import baby_growth_bp
+from routes.sync import sync_bp
+from routes.dashboard import dashboard_bp
 
 
 
@@ -41,6 +45,18 @@ app.register_blueprint(health_records_bp)
 app.register_blueprint(vaccinations_bp)
 app.register_blueprint(settings_bp)
 app.register_blueprint(baby_growth_bp)
+app.register_blueprint(sync_bp)
+app.register_blueprint(dashboard_bp)
+
+# Chat models load lazily; set CHAT_WARMUP=1 on workers that serve chat traffic
+if os.environ.get('CHAT_WARMUP') == '1':
+    app.logger.info("Chat resources warmed up: %s", warm_up())
+else:
+    app.logger.info("Chat resources deferred: %s", resource_report())
+
+# Reminders fire from one process only; set REMINDER_SCHEDULER=1 on that worker
+if os.environ.get('REMINDER_SCHEDULER') == '1':
+    app.logger.info("Reminder scheduler started: %s", start_scheduler().stats())
 
 # ── 13. Dev entrypoint ───────────────────────────────────────────────────
 if __name__ == '__main__':
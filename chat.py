@@ -1,3 +1,5 @@
+import time
+_IMPORT_STARTED = time.perf_counter()  # see resource_report()
 
 # --- Helper: Retrieve user profile (name, birthday) directly from DB ---
 def get_user_profile_db(user_id: int):
@@ -23,7 +25,9 @@ def get_today_health_tracker_db(user_id: int):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             cur.execute("""
-                SELECT sleep_hours, water_intake, steps
+                SELECT COALESCE(sleep_hours, 0.0) AS sleep_hours,
+                       COALESCE(water_intake, 0.0) AS water_intake,
+                       COALESCE(steps, 0) AS steps
                 FROM health_tracking
                 WHERE user_id = %s AND track_date = %s
             """, (user_id, today))
@@ -56,14 +60,21 @@ def casual_health_tip(user_id: int):
     if not tips:
         return ""
     return "\n\n---\n" + "\n".join(tips)
-def should_lookup(query: str) -> bool:
-    """Use the LLM to decide if a web lookup is needed for this query."""
+def should_lookup(query: str, query_vector=None) -> bool:
+    """Decide if a web lookup is needed: the local classifier first, the LLM only when it is unsure.
+
+    Pass query_vector when the query was already embedded (e.g. by the answer cache).
+    """
+    if lookup_classifier is not None:
+        decision = lookup_classifier.predict(query, vector=query_vector)
+        if decision is not None:
+            return decision
     prompt = (
         "You are an expert assistant. Decide if the following user question requires looking up external sources or if you can answer it from your own knowledge. "
         "Answer ONLY 'YES' or 'NO'.\n\n"
         f"User question: {query}"
     )
-    resp = llm.invoke([
+    resp = get_llm().invoke([
         SystemMessage(content=DETAILED_SYSTEM_PROMPT),
         HumanMessage(content=prompt)
     ])
@@ -72,20 +83,25 @@ def should_lookup(query: str) -> bool:
 chat.py – LLM + helper utilities for BabyGuardAI
 Only language / search / memory logic lives here.
 """
-import os, re, collections, requests
-from typing import Dict
+import os, sys, re, collections, requests, threading, queue, logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, TYPE_CHECKING
 
 from better_profanity import profanity
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 
-# LangChain / Groq
-from langchain_groq import ChatGroq
+# LangChain / Groq (heavy model/vector-store packages are imported lazily below)
 from langchain.schema import SystemMessage, HumanMessage
-from langchain.memory import ConversationBufferMemory
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.chains.summarize import load_summarize_chain
+if TYPE_CHECKING:
+    from langchain.memory import ConversationBufferMemory
+
+from utils.answer_cache import SemanticAnswerCache
+from utils.hybrid_retrieval import HybridRetriever
+from utils.page_fetcher import PageFetcher
+from utils.lookup_classifier import LookupClassifier
+from utils.session_memory import SessionMemoryStore
+
+logger = logging.getLogger(__name__)
 
 # ── NLTK one-time setup ────────────────────────────────────────────────
 from collections import Counter
@@ -106,15 +122,110 @@ def naive_topic(conversation: str) -> str:
     return topic.title() if topic else "New Chat"
 
 # ── Groq LLM & embeddings ───────────────────────────────────────────────
+# Built on first use so workers that never chat don't pay for them.
+# Call warm_up() in chat workers to load everything before the first request.
 load_dotenv()
-llm = ChatGroq(model="llama3-70b-8192", temperature=0)
+_llm = None
+_embedding_function = None
+_chroma_db = None
+_resource_lock = threading.Lock()
+_load_seconds: Dict[str, float] = {}
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _resource_lock:
+            if _llm is None:
+                started = time.perf_counter()
+                from langchain_groq import ChatGroq
+                _llm = ChatGroq(model="llama3-70b-8192", temperature=0)
+                _load_seconds["llm"] = time.perf_counter() - started
+    return _llm
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+def get_embeddings():
+    global _embedding_function
+    if _embedding_function is None:
+        with _resource_lock:
+            if _embedding_function is None:
+                started = time.perf_counter()
+                from langchain_huggingface import HuggingFaceEmbeddings
+                _embedding_function = HuggingFaceEmbeddings(
+                    model_name=EMBEDDING_MODEL
+                )
+                _load_seconds["embeddings"] = time.perf_counter() - started
+    return _embedding_function
+
+def get_chroma():
+    global _chroma_db
+    if _chroma_db is None:
+        embeddings = get_embeddings()
+        with _resource_lock:
+            if _chroma_db is None:
+                started = time.perf_counter()
+                from langchain_chroma import Chroma
+                _chroma_db = Chroma(persist_directory="chroma_db",
+                                    embedding_function=embeddings)
+                _load_seconds["chroma"] = time.perf_counter() - started
+    return _chroma_db
+
+def warm_up(llm: bool = True, embeddings: bool = True, chroma: bool = True) -> dict:
+    """Eagerly build the chat resources; returns resource_report()."""
+    if llm:
+        get_llm()
+    if embeddings:
+        get_embeddings()
+    if chroma:
+        get_chroma()
+    return resource_report()
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource  # peak rather than current RSS, in KiB on Linux / bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+def resource_report() -> dict:
+    return dict(
+        import_seconds=round(_IMPORT_SECONDS, 3),
+        loaded={name: round(sec, 3) for name, sec in _load_seconds.items()},
+        rss_mb=round(_rss_mb(), 1),
+    )
 
-embedding_function = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
+# ── Semantic answer cache ------------------------------------------------
+# Keyed on the system prompt as well as the question, so answers built with one
+# user's context are only reused for that same context. ANSWER_CACHE_SIZE=0
+# disables it.
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", 512))
+answer_cache = SemanticAnswerCache(
+    embed=lambda text: get_embeddings().embed_query(text),
+    max_size=ANSWER_CACHE_SIZE,
+    ttl=float(os.environ.get("ANSWER_CACHE_TTL", 6 * 3600)),
+    threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", 0.92)),
+) if ANSWER_CACHE_SIZE > 0 else None
+
+# ── Lookup classifier -----------------------------------------------------
+# Nearest-centroid over MiniLM embeddings replaces the should_lookup LLM call
+# unless its margin is below LOOKUP_MIN_MARGIN. Refit from logged chats with
+# train_lookup_classifier.py; LOOKUP_CLASSIFIER=0 always asks the LLM.
+LOOKUP_MODEL_FILE = os.environ.get("LOOKUP_MODEL_FILE", os.path.join("chroma_db", "lookup_classifier.json"))
+lookup_classifier = LookupClassifier(
+    embed_documents=lambda texts: get_embeddings().embed_documents(texts),
+    embed_query=lambda text: get_embeddings().embed_query(text),
+    model_path=LOOKUP_MODEL_FILE,
+    min_margin=float(os.environ.get("LOOKUP_MIN_MARGIN", 0.05)),
+    embedder=EMBEDDING_MODEL,
+) if os.environ.get("LOOKUP_CLASSIFIER", "1") == "1" else None
+
+# Appended to answers built from web results; also how the retrain tool labels them
+EXTERNAL_SOURCES_NOTE = (
+    "\n\n*Note: Information from external sources is for reference only. Always consult your "
+    "healthcare provider before making decisions about medication or treatment.*"
 )
-chroma_db = Chroma(persist_directory="chroma_db",
-                   embedding_function=embedding_function)
-
 
 # ── Dynamic Prompt & Formatting ------------------------------------------
 DETAILED_SYSTEM_PROMPT = (
@@ -146,14 +257,16 @@ def format_pretty(text: str) -> str:
     return '\n'.join(formatted)
 
 # ── Session memories -----------------------------------------------------
-session_memories: Dict[str, ConversationBufferMemory] = {}
-
-def _get_mem(session_uuid: str) -> ConversationBufferMemory:
-    if session_uuid not in session_memories:
-        session_memories[session_uuid] = ConversationBufferMemory(
-            memory_key="chat_history", return_messages=True
-        )
-    return session_memories[session_uuid]
+def _new_memory() -> "ConversationBufferMemory":
+    from langchain.memory import ConversationBufferMemory
+    return ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+
+session_memories = SessionMemoryStore(
+    memory_factory=_new_memory,
+    max_sessions=int(os.environ.get("SESSION_MEMORY_MAX_SESSIONS", 1000)),
+    idle_ttl=float(os.environ.get("SESSION_MEMORY_IDLE_TTL", 3600)),
+    max_messages=int(os.environ.get("SESSION_MEMORY_MAX_MESSAGES", 40)),
+)
 
 # ── Helper utilities (profanity, fetch, soften etc.) ---------------------
 def profanity_filter(text: str) -> str:
@@ -162,15 +275,16 @@ def profanity_filter(text: str) -> str:
         print("Warning: profanity censored")
     return censored
 
+# Pooled session + on-disk extracted-text cache (FETCH_CACHE_DIR / FETCH_CACHE_TTL)
+page_fetcher = PageFetcher(pool_size=int(os.environ.get("WEB_WORKERS", 4)) * 2)
+
 def fetch_page_content(url: str,
                        max_paragraphs: int = 5,
-                       max_length: int = 500) -> str:
+                       max_length: int = 500,
+                       timeout: float = 5) -> str:
     try:
-        html = requests.get(url, timeout=5).text
-        soup = BeautifulSoup(html, "html.parser")
-        paras = soup.find_all("p")[:max_paragraphs]
-        text  = " ".join(p.get_text(" ", strip=True) for p in paras)
-        return text[:max_length] or "No readable content found."
+        text = page_fetcher.text(url, max_paragraphs, max_length, timeout)
+        return text or "No readable content found."
     except Exception as e:
         return f"Could not extract content: {e}"
 
@@ -178,28 +292,150 @@ def soften_text(raw: str) -> str:
     prompt = (
         DETAILED_SYSTEM_PROMPT + "\n\n" + raw
     )
-    resp = llm.invoke(
+    resp = get_llm().invoke(
         [SystemMessage(content=DETAILED_SYSTEM_PROMPT), HumanMessage(content=raw)]
     )
     return format_pretty(resp.content.strip())
 
+# Web results are fetched and softened concurrently on a small shared pool, in
+# two stages with their own budgets: all fetches get FETCH_TIMEOUT, then the
+# pages that arrived get SOFTEN_TIMEOUT for the LLM pass. Results that miss a
+# stage are dropped. Running calls can't be cancelled, so a task that only
+# gets a worker after its stage deadline returns at once instead of adding to
+# the backlog the next request would queue behind.
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", 4))
+FETCH_TIMEOUT = float(os.environ.get("FETCH_TIMEOUT", 5))
+SOFTEN_TIMEOUT = float(os.environ.get("SOFTEN_TIMEOUT", 20))
+_web_pool = ThreadPoolExecutor(max_workers=WEB_WORKERS, thread_name_prefix="web-result")
+
+# Set when some web results were dropped, so the partial answer isn't cached
+_answer_state = threading.local()
+
+class _StageExpired(Exception):
+    pass
+
+def _before(deadline: float, fn, *args, **kwargs):
+    if time.monotonic() >= deadline:
+        raise _StageExpired()
+    return fn(*args, **kwargs)
+
+def _run_stage(stage: str, jobs, timeout: float) -> dict:
+    """Run {key: (fn, *args)} on the web pool; {key: result} for jobs done within timeout."""
+    deadline = time.monotonic() + timeout
+    futures = {key: _web_pool.submit(_before, deadline, *job) for key, job in jobs.items()}
+    done = {}
+    for key, fut in futures.items():
+        try:
+            done[key] = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except (FutureTimeout, _StageExpired):
+            fut.cancel()
+            _answer_state.degraded = True
+            logger.warning("Web result %s timed out: %s", stage, key)
+        except Exception as e:
+            _answer_state.degraded = True
+            logger.warning("Web result %s failed: %s: %s", stage, key, e)
+    return done
+
+def fetch_and_soften_results(results):
+    """Return (snippets, links) for search results, in the original result order."""
+    links = list(dict.fromkeys(res["link"] for res in results))
+    pages = _run_stage("fetch", {link: (fetch_page_content, link, 5, 500, FETCH_TIMEOUT) for link in links},
+                       FETCH_TIMEOUT)
+    softened = _run_stage("soften", {link: (soften_text, pages[link]) for link in links if link in pages},
+                          SOFTEN_TIMEOUT)
+    kept = [link for link in links if link in softened]
+    return [softened[link] for link in kept], kept
+
+# ── Streaming (server-sent events) ---------------------------------------
+# While stream_query() runs, the worker thread carries a sink that receives
+# (event, data) pairs: "progress" for pipeline stages and "token" for chunks
+# of the final answer. Without a sink everything behaves as before.
+_stream_local = threading.local()
+
+def _emit(event: str, data: str):
+    sink = getattr(_stream_local, "sink", None)
+    if sink is not None:
+        sink(event, data)
+
+def _progress(stage: str):
+    _emit("progress", stage)
+
+def _final_answer(messages) -> str:
+    sink = getattr(_stream_local, "sink", None)
+    if sink is None:
+        return get_llm().invoke(messages).content
+    parts = []
+    for chunk in get_llm().stream(messages):
+        if chunk.content:
+            parts.append(chunk.content)
+            sink("token", chunk.content)
+    return "".join(parts)
+
+def stream_query(user_msg: str, session_uuid: str, on_reply=None):
+    """Start process_query in a worker thread; return an iterator of its (event, data) pairs.
+
+    The worker starts right away and runs to completion whether or not the
+    iterator is consumed, so on_reply(full_reply), if given, is called from the
+    worker even when the client has disconnected. The last pair is
+    ("done", full_reply), preceded by ("error", message) if saving failed, or
+    just ("error", message) if the worker failed; the reply also carries the
+    disclaimer / sources / health-tip additions that are not streamed as tokens.
+    """
+    events = queue.Queue()
+
+    def run():
+        _stream_local.sink = lambda event, data: events.put((event, data))
+        try:
+            reply = process_query(user_msg, session_uuid)
+            if on_reply is not None:
+                try:
+                    on_reply(reply)
+                except Exception as e:
+                    logger.warning("Saving streamed reply for %s failed: %s", session_uuid, e)
+                    events.put(("error", "Failed to save the reply"))
+            events.put(("done", reply))
+        except Exception as e:
+            # Tell the client the reply failed instead of just ending the stream
+            events.put(("error", f"Error processing query: {e}"))
+        finally:
+            _stream_local.sink = None
+            events.put(None)
+
+    threading.Thread(target=run, daemon=True).start()
+
+    def relay():
+        while True:
+            item = events.get()
+            if item is None:
+                break
+            yield item
+    return relay()
+
 # ── Core search / answer pipeline ---------------------------------------
+# BM25 + vector search fused with RRF; weak matches return no docs, so the
+# summarize/soften LLM calls are skipped. The BM25 index is rebuilt after each
+# ingest_content.py run (it rewrites the state file).
+retriever = HybridRetriever(get_chroma, os.path.join("chroma_db", "ingest_state.json"), STOPWORDS)
+
 def _retrieve_and_summarize(query: str) -> str:
-    docs = chroma_db.similarity_search(query, k=3)
+    docs = retriever.retrieve(query, k=3)
     if not docs:
         return "NO_RELEVANT_INFO"
 
     context = " ".join(d.page_content for d in docs)
     # Use detailed prompt for summarization
-    chain = load_summarize_chain(llm, chain_type="stuff")
+    from langchain.chains.summarize import load_summarize_chain
+    chain = load_summarize_chain(get_llm(), chain_type="stuff")
     raw   = chain.run(docs)
     answer = soften_text(raw)
     return answer + DISCLAIMER
 
-def smart_search(query: str) -> str:
+def smart_search(query: str, query_vector=None) -> str:
     from langchain_google_community import GoogleSearchAPIWrapper
     # Decide if a lookup is needed
-    if not should_lookup(query):
+    _progress("Understanding your question")
+    if not should_lookup(query, query_vector):
+        _progress("Searching the knowledge base")
         db_ans = _retrieve_and_summarize(query)
         if db_ans == "NO_RELEVANT_INFO":
             # If no relevant info, respond conversationally but not off-topic, and in markdown
@@ -243,19 +479,20 @@ def smart_search(query: str) -> str:
                 "You do not have relevant information to answer this directly. However, if the user is asking about food, meals, or nutrition, suggest healthy meal ideas and nutrition tips for pregnant or postpartum women. "
                 "Otherwise, respond in a warm, concise, and supportive way, gently letting the user know you don't have information on that topic, and encourage them to ask about pregnancy, postpartum, or childcare. Do not go off-topic. Format your response in clear, concise markdown (use lists, headings, and bold where appropriate). Limit your response to 5-7 lines."
             )
-            resp = llm.invoke([
+            return _final_answer([
                 SystemMessage(content=DETAILED_SYSTEM_PROMPT),
                 HumanMessage(content=prompt)
-            ])
-            return resp.content.strip() + DISCLAIMER
+            ]).strip() + DISCLAIMER
         return db_ans
 
+    _progress("Searching the knowledge base")
     db_ans = _retrieve_and_summarize(query)
     if "NO_RELEVANT_INFO" not in db_ans:
         info = db_ans
         sources = []
     else:
         try:
+            _progress("Searching trusted sources on the web")
             search  = GoogleSearchAPIWrapper()
             results = search.results(query, 2)
             if not results:
@@ -264,24 +501,19 @@ def smart_search(query: str) -> str:
                     "You do not have relevant information to answer this directly. However, if the user is asking about food, meals, or nutrition, suggest healthy meal ideas and nutrition tips for pregnant or postpartum women. "
                     "Otherwise, respond in a warm, concise, and supportive way, gently letting the user know you don't have information on that topic, and encourage them to ask about pregnancy, postpartum, or childcare. Do not go off-topic. Format your response in clear, concise markdown (use lists, headings, and bold where appropriate). Limit your response to 5-7 lines."
                 )
-                resp = llm.invoke([
+                return _final_answer([
                     SystemMessage(content=DETAILED_SYSTEM_PROMPT),
                     HumanMessage(content=prompt)
-                ])
-                return resp.content.strip() + DISCLAIMER
-
-            outs = []
-            links = []
-            for res in results:
-                snippet = soften_text(fetch_page_content(res["link"]))
-                outs.append(snippet)
-                links.append(res["link"])
+                ]).strip() + DISCLAIMER
+
+            outs, links = fetch_and_soften_results(results)
             info = "\n\n".join(outs)
             sources = links
         except Exception:
             return "I’m having trouble accessing external sources right now." + DISCLAIMER
 
     # Always include sources if a lookup was performed, but warn user to consult their provider
+    _progress("Writing the answer")
     sources_text = "\n".join(f"- {link}" for link in sources) if sources else ""
     prompt = (
         f"You are a friendly nurse assistant. The user asked: '{query}'. "
@@ -290,14 +522,13 @@ def smart_search(query: str) -> str:
         "Please answer the user's question in a conversational, supportive, and concise way, as if you are chatting with them directly. "
         "Always include a 'Sources:' section if a lookup was performed, and remind the user to consult their healthcare provider before acting on any information from external sources. Format your response in clear, concise markdown (use lists, headings, and bold where appropriate). Limit your response to 5-7 lines."
     )
-    resp = llm.invoke([
+    answer = _final_answer([
         SystemMessage(content=DETAILED_SYSTEM_PROMPT),
         HumanMessage(content=prompt)
-    ])
-    answer = resp.content.strip()
+    ]).strip()
     # Add extra warning if sources were included
     if sources:
-        answer += "\n\n*Note: Information from external sources is for reference only. Always consult your healthcare provider before making decisions about medication or treatment.*"
+        answer += EXTERNAL_SOURCES_NOTE
     return answer + DISCLAIMER
 
 def _can_answer(q: str) -> bool:
@@ -370,18 +601,18 @@ def extract_user_id_from_session(session_uuid: str) -> int:
 
 def process_query(user_msg: str, session_uuid: str) -> str:
     try:
-        mem = _get_mem(session_uuid)
         clean = profanity_filter(user_msg)
 
         # You must pass the user_token to this function from your frontend/session
         # For now, try to get it from an environment variable for testing
 
         user_id = extract_user_id_from_session(session_uuid)
-        user_profile = get_user_profile_db(user_id)
         # Check for today's appointment queries
         if is_today_appointment_query(clean):
+            _progress("Checking your calendar")
             reply = get_todays_appointments(user_id)
         else:
+            user_profile = get_user_profile_db(user_id)
             # Always answer, with detailed, formatted, and empathetic response
             # Pass user profile info to the prompt for context, but do not prepend greeting in reply
             name = user_profile["user_name"] if user_profile and user_profile.get("user_name") else None
@@ -394,25 +625,31 @@ def process_query(user_msg: str, session_uuid: str) -> str:
             system_prompt = DETAILED_SYSTEM_PROMPT
             if user_context:
                 system_prompt = user_context + system_prompt
-            # Use the custom system prompt in smart_search
-            reply = smart_search(clean) if not user_context else smart_search_with_prompt(clean, system_prompt)
+            # The cache holds the generic answer, shared by every user; the
+            # per-user touches (health tip) are added below, after hit or miss
+            if answer_cache is not None:
+                reply = cached_smart_search(clean)
+            else:
+                reply = smart_search(clean) if not user_context else smart_search_with_prompt(clean, system_prompt)
+        if not is_today_appointment_query(clean):
             # Casually add health tip if relevant
             tip = casual_health_tip(user_id)
             if tip:
                 reply += tip
 
-        mem.chat_memory.add_user_message(clean)
-        mem.chat_memory.add_ai_message(reply)
+        session_memories.record(session_uuid, clean, reply)
         return reply
     except Exception as e:
         return f"Error processing query: {e}"
-def smart_search_with_prompt(query: str, system_prompt: str) -> str:
+def smart_search_with_prompt(query: str, system_prompt: str, query_vector=None) -> str:
     """Same as smart_search, but allows passing a custom system prompt."""
     from langchain_google_community import GoogleSearchAPIWrapper
     # Decide if a lookup is needed
     # Try/except block for the whole function
     try:
-        if not should_lookup(query):
+        _progress("Understanding your question")
+        if not should_lookup(query, query_vector):
+            _progress("Searching the knowledge base")
             db_ans = _retrieve_and_summarize(query)
             if db_ans == "NO_RELEVANT_INFO":
                 medication_keywords = [
@@ -454,19 +691,20 @@ def smart_search_with_prompt(query: str, system_prompt: str) -> str:
                     "You do not have relevant information to answer this directly. However, if the user is asking about food, meals, or nutrition, suggest healthy meal ideas and nutrition tips for pregnant or postpartum women. "
                     "Otherwise, respond in a warm, concise, and supportive way, gently letting the user know you don't have information on that topic, and encourage them to ask about pregnancy, postpartum, or childcare. Do not go off-topic. Format your response in clear, concise markdown (use lists, headings, and bold where appropriate). Limit your response to 5-7 lines."
                 )
-                resp = llm.invoke([
+                return _final_answer([
                     SystemMessage(content=system_prompt),
                     HumanMessage(content=prompt)
-                ])
-                return resp.content.strip() + DISCLAIMER
+                ]).strip() + DISCLAIMER
             return db_ans
 
+        _progress("Searching the knowledge base")
         db_ans = _retrieve_and_summarize(query)
         if "NO_RELEVANT_INFO" not in db_ans:
             info = db_ans
             sources = []
         else:
             try:
+                _progress("Searching trusted sources on the web")
                 search  = GoogleSearchAPIWrapper()
                 results = search.results(query, 2)
                 if not results:
@@ -475,23 +713,18 @@ def smart_search_with_prompt(query: str, system_prompt: str) -> str:
                         "You do not have relevant information to answer this directly. However, if the user is asking about food, meals, or nutrition, suggest healthy meal ideas and nutrition tips for pregnant or postpartum women. "
                         "Otherwise, respond in a warm, concise, and supportive way, gently letting the user know you don't have information on that topic, and encourage them to ask about pregnancy, postpartum, or childcare. Do not go off-topic. Format your response in clear, concise markdown (use lists, headings, and bold where appropriate). Limit your response to 5-7 lines."
                     )
-                    resp = llm.invoke([
+                    return _final_answer([
                         SystemMessage(content=system_prompt),
                         HumanMessage(content=prompt)
-                    ])
-                    return resp.content.strip() + DISCLAIMER
-
-                outs = []
-                links = []
-                for res in results:
-                    snippet = soften_text(fetch_page_content(res["link"]))
-                    outs.append(snippet)
-                    links.append(res["link"])
+                    ]).strip() + DISCLAIMER
+
+                outs, links = fetch_and_soften_results(results)
                 info = "\n\n".join(outs)
                 sources = links
             except Exception:
                 return "I’m having trouble accessing external sources right now." + DISCLAIMER
 
+        _progress("Writing the answer")
         sources_text = "\n".join(f"- {link}" for link in sources) if sources else ""
         prompt = (
             f"You are a friendly nurse assistant. The user asked: '{query}'. "
@@ -500,20 +733,44 @@ def smart_search_with_prompt(query: str, system_prompt: str) -> str:
             "Please answer the user's question in a conversational, supportive, and concise way, as if you are chatting with them directly. "
             "Always include a 'Sources:' section if a lookup was performed, and remind the user to consult their healthcare provider before acting on any information from external sources. Format your response in clear, concise markdown (use lists, headings, and bold where appropriate). Limit your response to 5-7 lines."
         )
-        resp = llm.invoke([
+        answer = _final_answer([
             SystemMessage(content=system_prompt),
             HumanMessage(content=prompt)
-        ])
-        answer = resp.content.strip()
+        ]).strip()
         if sources:
-            answer += "\n\n*Note: Information from external sources is for reference only. Always consult your healthcare provider before making decisions about medication or treatment.*"
+            answer += EXTERNAL_SOURCES_NOTE
         return answer + DISCLAIMER
     except Exception as e:
         return f"Error processing request: {e}"
 
+# Error / outage replies must not be served to other users from the cache
+_UNCACHEABLE_PREFIXES = ("Error processing", "I’m having trouble accessing")
+
+def cached_smart_search(query: str) -> str:
+    """smart_search behind the semantic answer cache, under the shared base prompt.
+
+    Only the generic answer is cached; name/birthday would make every key
+    user-specific, so callers personalize the reply after this returns.
+    """
+    answer, vector = answer_cache.lookup(query, context=DETAILED_SYSTEM_PROMPT)
+    if answer is not None:
+        _progress("Found an answer to a similar question")
+        return answer
+    _answer_state.degraded = False
+    answer = smart_search(query, vector)
+    # Answers missing some web results would be served degraded for the whole TTL
+    if not answer.startswith(_UNCACHEABLE_PREFIXES) and not _answer_state.degraded:
+        answer_cache.store(query, answer, vector, context=DETAILED_SYSTEM_PROMPT)
+    return answer
+
 # Exported symbols for import in other modules
 __all__ = [
-    "llm",
+    "get_llm",
+    "warm_up",
+    "resource_report",
     "process_query",
+    "stream_query",
     "naive_topic"
 ]
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
@@ -0,0 +1,147 @@
+"""
+ingest_content.py – load educational_content articles into the chroma_db store
+that chat._retrieve_and_summarize searches.
+
+Incremental by default: only rows whose updated_at is at or after the last
+run's watermark (kept in chroma_db/ingest_state.json), less WATERMARK_OVERLAP,
+are chunked, embedded and upserted. The overlap re-reads rows updated just
+before the watermark but committed after that run read them; re-ingesting a
+row is harmless because its chunks are replaced.
+
+    python ingest_content.py            # changed rows only
+    python ingest_content.py --full     # everything, and drop chunks of deleted rows
+"""
+import argparse, datetime, json, os, re, time
+
+from utils.db import create_db_connection
+from chat import get_chroma
+
+STATE_FILE = os.path.join("chroma_db", "ingest_state.json")
+CHUNK_SIZE = 1000      # characters
+CHUNK_OVERLAP = 150
+ROW_BATCH = 500        # rows fetched per query
+EMBED_BATCH = 256      # chunks embedded + upserted per call
+WATERMARK_OVERLAP = datetime.timedelta(seconds=60)
+
+def load_state() -> dict:
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state: dict):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, STATE_FILE)
+
+def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP):
+    """Split on paragraph boundaries, packing paragraphs into chunks of at most size characters."""
+    paras = [p.strip() for p in re.split(r"\n\s*\n", text or "") if p.strip()]
+    chunks, current = [], ""
+    for para in paras:
+        while len(para) > size:  # a single huge paragraph: hard split with overlap
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(para[:size])
+            para = para[size - overlap:]
+        if current and len(current) + len(para) + 2 > size:
+            chunks.append(current)
+            # Carry the overlap only when it still fits next to the paragraph
+            keep = min(overlap, size - len(para) - 2)
+            current = current[-keep:] + "\n\n" + para if keep > 0 else para
+        else:
+            current = f"{current}\n\n{para}" if current else para
+    if current:
+        chunks.append(current)
+    return chunks
+
+def iter_changed_rows(since):
+    """Yield batches of rows with (updated_at, id) >= (since, 0), keyset-paginated on (updated_at, id)."""
+    # id 0 sorts before every row, so the first page includes all of `since`
+    last = (since or datetime.datetime(1970, 1, 1), 0)
+    while True:
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            cur.execute("""
+                SELECT ec.id, ec.title, ec.content_type, ec.difficulty_level,
+                       ec.content_body, ec.updated_at, cc.category_name
+                FROM educational_content ec
+                JOIN content_categories cc ON cc.id = ec.category_id
+                WHERE (ec.updated_at, ec.id) > (%s, %s)
+                ORDER BY ec.updated_at, ec.id
+                LIMIT %s
+            """, (last[0], last[1], ROW_BATCH))
+            rows = cur.fetchall()
+        if not rows:
+            return
+        yield rows
+        last = (rows[-1]["updated_at"], rows[-1]["id"])
+
+def chunk_ids_for(store, content_ids):
+    if not content_ids:
+        return []
+    found = store.get(where={"content_id": {"$in": list(content_ids)}}, include=[])
+    return found.get("ids", [])
+
+def ingest(full: bool = False) -> dict:
+    store = get_chroma()
+    state = {} if full else load_state()
+    since = (datetime.datetime.fromisoformat(state["updated_at"]) - WATERMARK_OVERLAP
+             if state.get("updated_at") else None)
+    stats = dict(rows=0, chunks=0, deleted=0)
+    seen_ids = set()
+    started = time.perf_counter()
+
+    for rows in iter_changed_rows(since):
+        texts, metadatas, ids = [], [], []
+        for row in rows:
+            seen_ids.add(row["id"])
+            body = f"{row['title']}\n\n{row['content_body'] or ''}"
+            for n, chunk in enumerate(chunk_text(body)):
+                texts.append(chunk)
+                ids.append(f"content-{row['id']}-{n}")
+                metadatas.append({
+                    "content_id": row["id"],
+                    "title": row["title"],
+                    "category": row["category_name"],
+                    "content_type": row["content_type"],
+                    "difficulty_level": row["difficulty_level"] or "",
+                    "updated_at": row["updated_at"].isoformat(),
+                })
+        # Replace the old chunks of these rows (an edit may leave fewer chunks)
+        stale = chunk_ids_for(store, [row["id"] for row in rows])
+        if stale:
+            store.delete(ids=stale)
+            stats["deleted"] += len(stale)
+        for i in range(0, len(texts), EMBED_BATCH):
+            store.add_texts(texts[i:i + EMBED_BATCH],
+                            metadatas=metadatas[i:i + EMBED_BATCH],
+                            ids=ids[i:i + EMBED_BATCH])
+        stats["rows"] += len(rows)
+        stats["chunks"] += len(texts)
+        # Persist the watermark per batch so an interrupted run resumes where it stopped
+        state["updated_at"] = rows[-1]["updated_at"].isoformat()
+        state.pop("id", None)
+        save_state(state)
+
+    if full:
+        # Rows deleted from educational_content leave orphaned chunks behind
+        indexed = store.get(include=["metadatas"])
+        orphans = [cid for cid, meta in zip(indexed.get("ids", []), indexed.get("metadatas", []))
+                   if cid.startswith("content-") and (meta or {}).get("content_id") not in seen_ids]
+        if orphans:
+            store.delete(ids=orphans)
+            stats["deleted"] += len(orphans)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index educational_content into chroma_db")
+    parser.add_argument("--full", action="store_true",
+                        help="re-index every row and remove chunks of deleted rows")
+    args = parser.parse_args()
+    print(ingest(full=args.full))
@@ -0,0 +1,104 @@
+"""
+migrate_storage.py – move user_media files from the old flat uploads/ layout
+(<uuid8>_<filename>) into content-addressed, hash-sharded keys, rewriting
+image_url and backfilling content_hash.
+
+Files are copied into the configured backend (STORAGE_BACKEND) first and the
+old copies removed only after the batch's rows are committed, so an
+interrupted run can simply be started again.
+
+    python migrate_storage.py --dry-run   # report what would move
+    python migrate_storage.py
+"""
+import argparse, hashlib, os, time
+
+from mysql.connector import IntegrityError
+from utils.db import create_db_connection
+from utils.storage import LocalDiskStorage, get_storage, content_key, media_url, key_from_name
+from utils.thumbnails import IMAGE_SIZES, derived_key
+
+ROW_BATCH = 200
+SHARDED_URL = 'uploads/__/__/%'
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def iter_legacy_rows(after_id=0):
+    """Yield batches of rows still pointing at the flat layout, keyset-paginated on id."""
+    while True:
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            cur.execute("""
+                SELECT id, user_id, image_url FROM user_media
+                WHERE id > %s AND image_url NOT LIKE %s
+                ORDER BY id
+                LIMIT %s
+            """, (after_id, SHARDED_URL, ROW_BATCH))
+            rows = cur.fetchall()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1]["id"]
+
+def migrate(dry_run: bool = False) -> dict:
+    legacy = LocalDiskStorage(os.environ.get("UPLOAD_FOLDER", "uploads"))
+    storage = get_storage()
+    stats = dict(rows=0, copied=0, shared=0, missing=0, unhashed=0)
+    started = time.perf_counter()
+
+    for rows in iter_legacy_rows():
+        updates, done = [], []
+        for row in rows:
+            old_key = key_from_name(row["image_url"] or "")
+            src = legacy.local_path(old_key) if old_key else None
+            if not src or not os.path.isfile(src):
+                print(f"missing file for media {row['id']}: {row['image_url']}")
+                stats["missing"] += 1
+                continue
+            content_hash = file_sha256(src)
+            key = content_key(content_hash, old_key)
+            if storage.exists(key):
+                stats["shared"] += 1
+            else:
+                stats["copied"] += 1
+                if not dry_run:
+                    storage.put_file(key, src, move=False)
+            if not dry_run:
+                # Carry over derivatives already rendered instead of regenerating them
+                for size in IMAGE_SIZES:
+                    old_derived = legacy.local_path(derived_key(old_key, size))
+                    if os.path.isfile(old_derived) and not storage.exists(derived_key(key, size)):
+                        storage.put_file(derived_key(key, size), old_derived, move=False)
+            updates.append((row["id"], media_url(key), content_hash))
+            done.append(old_key)
+        stats["rows"] += len(updates)
+        if dry_run or not updates:
+            continue
+
+        with create_db_connection() as conn, conn.cursor() as cur:
+            for media_id, image_url, content_hash in updates:
+                try:
+                    cur.execute("UPDATE user_media SET image_url = %s, content_hash = %s WHERE id = %s",
+                                (image_url, content_hash, media_id))
+                except IntegrityError:
+                    # The user already has a row with these bytes; share the file
+                    # but leave this row's hash NULL (the unique key allows one)
+                    cur.execute("UPDATE user_media SET image_url = %s WHERE id = %s", (image_url, media_id))
+                    stats["unhashed"] += 1
+            conn.commit()
+        for old_key in done:
+            legacy.delete(old_key)
+            for size in IMAGE_SIZES:
+                legacy.delete(derived_key(old_key, size))
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move user_media files into the content-addressed layout")
+    parser.add_argument("--dry-run", action="store_true", help="report only; change nothing")
+    args = parser.parse_args()
+    print(migrate(dry_run=args.dry_run))
@@ -0,0 +1,27 @@
+-- One health_tracking row per user per day and one baby_growth_records row per
+-- child per day, so the tracker and growth PATCH endpoints can write with a
+-- single INSERT ... ON DUPLICATE KEY UPDATE.
+
+-- Collapse existing duplicates, keeping the newest row of each day
+DELETE ht FROM health_tracking ht
+JOIN health_tracking newer
+  ON newer.user_id = ht.user_id AND newer.track_date = ht.track_date AND newer.id > ht.id;
+
+DELETE bg FROM baby_growth_records bg
+JOIN baby_growth_records newer
+  ON newer.child_id = bg.child_id AND newer.record_date = bg.record_date AND newer.id > bg.id;
+
+ALTER TABLE health_tracking
+  ADD UNIQUE KEY `uq_health_tracking_user_date` (`user_id`, `track_date`);
+
+-- Measurements are optional: a day may only have a weight, or only notes.
+-- The old zero placeholders mean "not measured".
+ALTER TABLE baby_growth_records
+  MODIFY `weight` decimal(5,2) NULL COMMENT 'Weight in kilograms',
+  MODIFY `height` decimal(5,2) NULL COMMENT 'Height in centimeters',
+  MODIFY `head_circumference` decimal(5,2) NULL COMMENT 'Head circumference in centimeters',
+  ADD UNIQUE KEY `uq_growth_child_date` (`child_id`, `record_date`);
+
+UPDATE baby_growth_records SET weight = NULL WHERE weight = 0;
+UPDATE baby_growth_records SET height = NULL WHERE height = 0;
+UPDATE baby_growth_records SET head_circumference = NULL WHERE head_circumference = 0;
@@ -0,0 +1,10 @@
+-- Idempotency keys for POST /api/sync: a replayed mutation returns the stored
+-- result instead of being applied twice.
+CREATE TABLE `sync_mutations` (
+  `user_id` int NOT NULL,
+  `idempotency_key` varchar(64) NOT NULL,
+  `result` json NOT NULL,
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`user_id`, `idempotency_key`),
+  CONSTRAINT `sync_mutations_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,6 @@
+-- Keyset pagination on (created_at, id) for chat messages and sessions
+ALTER TABLE messages
+  ADD KEY `idx_messages_session_created` (`session_uuid`, `created_at`, `id`);
+
+ALTER TABLE chat_sessions
+  ADD KEY `idx_chat_sessions_user_start` (`user_id`, `start_time`, `id`);
@@ -0,0 +1,8 @@
+-- Version counters behind the list endpoints' ETags. Writers bump the row for
+-- the scope they touch in the same transaction as the write.
+CREATE TABLE `data_versions` (
+  `scope` varchar(32) NOT NULL,
+  `owner_id` varchar(36) NOT NULL COMMENT 'user id or child id, depending on scope',
+  `version` bigint NOT NULL DEFAULT '0',
+  PRIMARY KEY (`scope`, `owner_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,6 @@
+-- SHA-256 of each stored image so identical uploads from the same user are
+-- stored once. Rows from before this migration have NULL until the storage
+-- migration tool backfills them.
+ALTER TABLE user_media
+  ADD COLUMN `content_hash` char(64) DEFAULT NULL,
+  ADD UNIQUE KEY `uq_user_media_hash` (`user_id`, `content_hash`);
@@ -0,0 +1,5 @@
+-- Content-addressed files are shared by every user_media row with the same
+-- bytes; deleting a row looks up other rows on the same image_url before the
+-- file is removed.
+ALTER TABLE user_media
+  ADD KEY `idx_user_media_image_url` (`image_url`);
@@ -0,0 +1,33 @@
+-- Weekly (Monday-start) and monthly sums of health_tracking, so tracker
+-- history over long ranges reads a few rows per period instead of every day.
+-- Writers refresh the periods containing the days they touch; the *_days
+-- columns count days with a value, for averages that ignore unlogged days.
+CREATE TABLE `tracker_rollups` (
+  `user_id` int NOT NULL,
+  `period` enum('week','month') NOT NULL,
+  `period_start` date NOT NULL,
+  `sleep_total` decimal(8,1) NOT NULL DEFAULT '0.0',
+  `sleep_days` smallint NOT NULL DEFAULT '0',
+  `water_total` decimal(10,2) NOT NULL DEFAULT '0.00',
+  `water_days` smallint NOT NULL DEFAULT '0',
+  `steps_total` bigint NOT NULL DEFAULT '0',
+  `steps_days` smallint NOT NULL DEFAULT '0',
+  PRIMARY KEY (`user_id`, `period`, `period_start`),
+  CONSTRAINT `tracker_rollups_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT INTO tracker_rollups
+SELECT user_id, 'week', DATE_SUB(track_date, INTERVAL WEEKDAY(track_date) DAY) AS period_start,
+       COALESCE(SUM(sleep_hours), 0), COUNT(sleep_hours),
+       COALESCE(SUM(water_intake), 0), COUNT(water_intake),
+       COALESCE(SUM(steps), 0), COUNT(steps)
+FROM health_tracking
+GROUP BY user_id, period_start;
+
+INSERT INTO tracker_rollups
+SELECT user_id, 'month', DATE_FORMAT(track_date, '%Y-%m-01') AS period_start,
+       COALESCE(SUM(sleep_hours), 0), COUNT(sleep_hours),
+       COALESCE(SUM(water_intake), 0), COUNT(water_intake),
+       COALESCE(SUM(steps), 0), COUNT(steps)
+FROM health_tracking
+GROUP BY user_id, period_start;
@@ -0,0 +1,9 @@
+-- How recurring events repeat. Events flagged is_recurring before this
+-- migration had no rule; they are treated as weekly series.
+ALTER TABLE calendar_events
+  ADD COLUMN `recurrence_freq` enum('daily','weekly','monthly','yearly') DEFAULT NULL,
+  ADD COLUMN `recurrence_interval` smallint NOT NULL DEFAULT '1',
+  ADD COLUMN `recurrence_until` date DEFAULT NULL,
+  ADD KEY `idx_calendar_recurring` (`user_id`, `is_recurring`, `event_date`);
+
+UPDATE calendar_events SET recurrence_freq = 'weekly' WHERE is_recurring = 1;
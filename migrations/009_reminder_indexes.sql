@@ -0,0 +1,7 @@
+-- The reminder scheduler loads everything due in the next few days across
+-- all users, so it needs date-leading indexes rather than the per-user ones.
+ALTER TABLE calendar_events
+  ADD KEY `idx_calendar_due` (`is_recurring`, `event_date`);
+
+ALTER TABLE child_vaccinations
+  ADD KEY `idx_vaccinations_next_due` (`next_due_date`);
@@ -0,0 +1,4 @@
+-- ingest_content.py walks changed content in (updated_at, id) order from the
+-- last watermark; without this index every batch is a full scan and sort.
+ALTER TABLE educational_content
+  ADD KEY `idx_content_updated` (`updated_at`, `id`);
@@ -0,0 +1,12 @@
+-- When each recurring series next sends a reminder, so the reminder
+-- scheduler range-scans the series due in its window instead of expanding
+-- every live series on each reconcile. Seeded with the first occurrence's
+-- reminder; the scheduler moves it forward (NULL once a series has ended).
+ALTER TABLE calendar_events
+  ADD COLUMN `next_reminder_at` datetime DEFAULT NULL,
+  ADD KEY `idx_calendar_next_reminder` (`is_recurring`, `next_reminder_at`);
+
+UPDATE calendar_events
+SET next_reminder_at = TIMESTAMP(event_date, COALESCE(event_time, '00:00:00'))
+                       - INTERVAL LEAST(GREATEST(reminder_offset, 0), 43200) MINUTE
+WHERE is_recurring = 1;
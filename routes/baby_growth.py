@@ -1,44 +1,16 @@
 from flask import Blueprint, request, jsonify
 from utils.db import create_db_connection
 from utils.auth_utils import token_required
+from utils.current_child import get_current_child_id
+from utils.versions import bump_version, get_etag, is_fresh, not_modified, with_etag
+from utils.growth import SEXES, growth_analytics, cached_analytics, cache_analytics
 from mysql.connector import Error
 import datetime
-from functools import wraps
 
 baby_growth_bp = Blueprint('baby_growth', __name__)
 
-def ensure_today_record(f):
-    @wraps(f)
-    def decorated(current_user_id, *args, **kwargs):
-        today = datetime.date.today().isoformat()
-        try:
-            with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
-                cur.execute("""
-                    SELECT current_child_id
-                    FROM users
-                    WHERE id = %s
-                """, (current_user_id,))
-                user = cur.fetchone()
-                if not user or not user['current_child_id']:
-                    return f(current_user_id, *args, **kwargs)  # Skip if no child
-                cur.execute("""
-                    SELECT id FROM baby_growth_records
-                    WHERE child_id = %s AND record_date = %s
-                """, (user['current_child_id'], today))
-                if not cur.fetchone():
-                    cur.execute("""
-                        INSERT INTO baby_growth_records (child_id, record_date, weight, height, head_circumference)
-                        VALUES (%s, %s, 0.00, 0.00, 0.00)
-                    """, (user['current_child_id'], today))
-                    conn.commit()
-        except Error:
-            pass
-        return f(current_user_id, *args, **kwargs)
-    return decorated
-
 @baby_growth_bp.route('/api/baby-growth', methods=['PATCH'])
 @token_required
-@ensure_today_record
 def update_baby_growth(current_user_id):
     data = request.get_json() or {}
     if not any(k in data for k in ['weight', 'height', 'head_circumference', 'notes']):
@@ -46,33 +18,22 @@ def update_baby_growth(current_user_id):
     
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
-            cur.execute("""
-                SELECT current_child_id
-                FROM users
-                WHERE id = %s
-            """, (current_user_id,))
-            user = cur.fetchone()
+            child_id = get_current_child_id(current_user_id, cur)
             
-            if not user or not user['current_child_id']:
+            if not child_id:
                 return jsonify(error='No child selected. Please select a child first.'), 400
                 
             today = datetime.date.today().isoformat()
-            update_fields = []
-            update_values = []
-            for field in ['weight', 'height', 'head_circumference', 'notes']:
-                if field in data:
-                    update_fields.append(f"{field} = %s")
-                    update_values.append(data[field])
-            
-            if update_fields:
-                update_values.extend([datetime.datetime.now(), user['current_child_id'], today])
-                query = f"""
-                    UPDATE baby_growth_records
-                    SET {', '.join(update_fields)}, created_at = %s
-                    WHERE child_id = %s AND record_date = %s
-                """
-                cur.execute(query, update_values)
-                conn.commit()
+            fields = [f for f in ['weight', 'height', 'head_circumference', 'notes'] if f in data]
+            # One upsert on the unique (child_id, record_date) key; fields not sent keep their value
+            columns = fields + ['created_at']
+            cur.execute(f"""
+                INSERT INTO baby_growth_records (child_id, record_date, {', '.join(columns)})
+                VALUES (%s, %s, {', '.join(['%s'] * len(columns))}) AS new
+                ON DUPLICATE KEY UPDATE {', '.join(f'{c} = new.{c}' for c in columns)}
+            """, (child_id, today, *[data[f] for f in fields], datetime.datetime.now()))
+            bump_version(cur, 'baby_growth', child_id)
+            conn.commit()
                 
         return jsonify(message='Baby growth record updated successfully'), 200
     except Error as e:
@@ -83,15 +44,14 @@ def update_baby_growth(current_user_id):
 def get_baby_growth(current_user_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
-            cur.execute("""
-                SELECT current_child_id
-                FROM users
-                WHERE id = %s
-            """, (current_user_id,))
-            user = cur.fetchone()
+            child_id = get_current_child_id(current_user_id, cur)
             
-            if not user or not user['current_child_id']:
+            if not child_id:
                 return jsonify(growth_records=[]), 200
+
+            etag = get_etag(cur, 'baby_growth', child_id)
+            if is_fresh(etag):
+                return not_modified(etag)
                 
             cur.execute("""
                 SELECT 
@@ -106,7 +66,7 @@ def get_baby_growth(current_user_id):
                 FROM baby_growth_records 
                 WHERE child_id = %s
                 ORDER BY record_date DESC
-            """, (user['current_child_id'],))
+            """, (child_id,))
             records = cur.fetchall()
             
             for record in records:
@@ -115,24 +75,63 @@ def get_baby_growth(current_user_id):
                 if record['created_at']:
                     record['created_at'] = record['created_at'].isoformat()
                 
-            return jsonify(growth_records=records), 200
+            return with_etag(jsonify(growth_records=records), etag), 200
     except Error as e:
         return jsonify(error=f'Failed to fetch baby growth records: {str(e)}'), 500
 
+@baby_growth_bp.route('/api/baby-growth/analytics', methods=['GET'])
+@token_required
+def get_growth_analytics(current_user_id):
+    """WHO z-scores and percentiles for the selected child's whole history.
+
+    Children recorded with gender 'Other' need ?sex=male|female to pick a reference.
+    """
+    sex = request.args.get('sex')
+    if sex and sex not in SEXES.values():
+        return jsonify(error='sex must be male or female'), 400
+    try:
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            child_id = get_current_child_id(current_user_id, cur)
+            if not child_id:
+                return jsonify(error='No child selected. Please select a child first.'), 400
+            cur.execute("SELECT birth_date, gender FROM children WHERE id = %s AND user_id = %s",
+                        (child_id, current_user_id))
+            child = cur.fetchone()
+            if not child:
+                return jsonify(error='Child not found'), 404
+            sex = sex or SEXES.get(child['gender'])
+
+            etag = f"{get_etag(cur, 'baby_growth', child_id)}-z-{child['birth_date']}-{sex}"
+            if is_fresh(etag):
+                return not_modified(etag)
+            result = cached_analytics(child_id, etag)
+            if result is None:
+                cur.execute("""
+                    SELECT record_date, weight, height, head_circumference
+                    FROM baby_growth_records
+                    WHERE child_id = %s
+                    ORDER BY record_date
+                """, (child_id,))
+                result = growth_analytics(child['birth_date'], sex, cur.fetchall())
+                cache_analytics(child_id, etag, result)
+        return with_etag(jsonify(child_id=child_id, **result), etag), 200
+    except Error as e:
+        return jsonify(error=f'Failed to compute growth analytics: {str(e)}'), 500
+
 @baby_growth_bp.route('/api/baby-growth/<int:growth_id>', methods=['DELETE'])
 @token_required
 def delete_baby_growth(current_user_id, growth_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
-            cur.execute("SELECT current_child_id FROM users WHERE id = %s", (current_user_id,))
-            user = cur.fetchone()
-            if not user or not user['current_child_id']:
+            child_id = get_current_child_id(current_user_id, cur)
+            if not child_id:
                 return jsonify(error='No child selected.'), 400
             
             cur.execute("DELETE FROM baby_growth_records WHERE id = %s AND child_id = %s", 
-                       (growth_id, user['current_child_id']))
+                       (growth_id, child_id))
             if cur.rowcount == 0:
                 return jsonify(error='Growth record not found or not authorized'), 404
+            bump_version(cur, 'baby_growth', child_id)
             conn.commit()
         return jsonify(message='Baby growth record deleted successfully'), 200
     except Error as e:
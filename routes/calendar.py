@@ -1,10 +1,31 @@
 from flask import Blueprint, request, jsonify
 from utils.db import create_db_connection
 from utils.auth_utils import token_required
+from utils.versions import bump_version, get_etag, is_fresh, not_modified, with_etag
+from utils.recurrence import FREQUENCIES, occurrences
+from utils.reminders import refresh_event, seed_next_reminder
 from mysql.connector import Error
+import datetime
 
 calendar_bp = Blueprint('calendar', __name__)
 
+MAX_WINDOW_DAYS = 366
+
+def _recurrence(data):
+    """(is_recurring, freq, interval, until) from a request body; raises ValueError."""
+    freq = data.get('recurrence_freq')
+    if freq is None and data.get('is_recurring'):
+        freq = 'weekly'
+    if freq is None:
+        return 0, None, 1, None
+    if freq not in FREQUENCIES:
+        raise ValueError(f"recurrence_freq must be one of: {', '.join(FREQUENCIES)}")
+    interval = int(data.get('recurrence_interval') or 1)
+    if not 1 <= interval <= 1000:
+        raise ValueError('recurrence_interval must be between 1 and 1000')
+    until = data.get('recurrence_until')
+    return 1, freq, interval, datetime.date.fromisoformat(until).isoformat() if until else None
+
 @calendar_bp.route('/api/calendar-events', methods=['POST'])
 @token_required
 def create_calendar_event(current_user_id):
@@ -12,22 +33,31 @@ def create_calendar_event(current_user_id):
     required = ['event_type', 'event_date', 'event_time', 'title']
     if not all(k in data for k in required):
         return jsonify(error='Missing fields'), 400
+    try:
+        is_recurring, freq, interval, until = _recurrence(data)
+    except (ValueError, TypeError) as e:
+        return jsonify(error=str(e)), 400
 
     try:
         with create_db_connection() as conn, conn.cursor() as cur:
             cur.execute("""
                 INSERT INTO calendar_events (
                     user_id, event_type, event_date, event_time, title,
-                    description, reminder_offset, is_recurring
+                    description, reminder_offset, is_recurring,
+                    recurrence_freq, recurrence_interval, recurrence_until
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (
                 current_user_id, data['event_type'], data['event_date'],
                 data['event_time'], data['title'],
                 data.get('description', ''), data.get('reminder_offset', 0),
-                int(data.get('is_recurring', False))
+                is_recurring, freq, interval, until
             ))
+            event_id = cur.lastrowid
+            seed_next_reminder(cur, event_id)
+            bump_version(cur, 'calendar', current_user_id)
             conn.commit()
+        refresh_event(event_id)
         return jsonify(message='Calendar event created successfully'), 201
     except Error:
         return jsonify(error='Failed to create calendar event'), 500
@@ -35,15 +65,63 @@ def create_calendar_event(current_user_id):
 @calendar_bp.route('/api/get-calendar-events', methods=['GET'])
 @token_required
 def get_calendar_events(current_user_id):
+    """All events, or with ?start=&end= (YYYY-MM-DD) the occurrences in that window."""
+    if request.args.get('start') or request.args.get('end'):
+        return _get_calendar_window(current_user_id)
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            etag = get_etag(cur, 'calendar', current_user_id)
+            if is_fresh(etag):
+                return not_modified(etag)
             cur.execute("""
                 SELECT * FROM calendar_events
                 WHERE user_id = %s
                 ORDER BY event_date, event_time
             """, (current_user_id,))
             events = cur.fetchall()
-        return jsonify(calendar_events=events), 200
+        return with_etag(jsonify(calendar_events=events), etag), 200
+    except Error:
+        return jsonify(error='Failed to retrieve calendar events'), 500
+
+def calendar_window(cur, user_id, start, end):
+    """One entry per occurrence in [start, end], with event_date set to the occurrence's date.
+
+    One-off events come from an (user_id, event_date) range scan; recurring
+    series are read from their own index and expanded for the window only.
+    """
+    cur.execute("""
+        SELECT * FROM calendar_events
+        WHERE user_id = %s AND event_date BETWEEN %s AND %s
+          AND (is_recurring = 0 OR is_recurring IS NULL)
+    """, (user_id, start, end))
+    events = cur.fetchall()
+    cur.execute("""
+        SELECT * FROM calendar_events
+        WHERE user_id = %s AND is_recurring = 1 AND event_date <= %s
+          AND (recurrence_until IS NULL OR recurrence_until >= %s)
+    """, (user_id, end, start))
+    for series in cur.fetchall():
+        for day in occurrences(series['event_date'], series['recurrence_freq'] or 'weekly',
+                               series['recurrence_interval'], start, end, series['recurrence_until']):
+            events.append(dict(series, event_date=day, series_start=series['event_date']))
+    events.sort(key=lambda e: (e['event_date'], e['event_time'] or datetime.timedelta()))
+    return events
+
+def _get_calendar_window(current_user_id):
+    try:
+        start = datetime.date.fromisoformat(request.args.get('start', ''))
+        end = datetime.date.fromisoformat(request.args.get('end', ''))
+    except ValueError:
+        return jsonify(error='start and end must be dates (YYYY-MM-DD)'), 400
+    if not 0 <= (end - start).days < MAX_WINDOW_DAYS:
+        return jsonify(error=f'end must be on or after start and within {MAX_WINDOW_DAYS} days'), 400
+    try:
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            etag = f"{get_etag(cur, 'calendar', current_user_id)}-{start}-{end}"
+            if is_fresh(etag):
+                return not_modified(etag)
+            events = calendar_window(cur, current_user_id, start, end)
+        return with_etag(jsonify(calendar_events=events, start=start.isoformat(), end=end.isoformat()), etag), 200
     except Error:
         return jsonify(error='Failed to retrieve calendar events'), 500
 
@@ -58,7 +136,9 @@ def delete_calendar_event(current_user_id, event_id):
             if not cur.fetchone():
                 return jsonify(error='Event not found or unauthorized'), 404
             cur.execute("DELETE FROM calendar_events WHERE id = %s", (event_id,))
+            bump_version(cur, 'calendar', current_user_id)
             conn.commit()
+        refresh_event(event_id)
         return jsonify(message='Calendar event deleted successfully'), 200
     except Error:
         return jsonify(error='Failed to delete calendar event'), 500
@@ -1,13 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from utils.db import create_db_connection
 from utils.auth_utils import token_required
-from chat import llm, process_query, naive_topic
+from utils.helpers import encode_cursor, decode_cursor
+from chat import get_llm, process_query, stream_query, naive_topic, session_memories
 from langchain.schema import SystemMessage, HumanMessage
 from mysql.connector import Error
+import json
 import uuid
 
 chat_bp = Blueprint('chat', __name__)
 
+DEFAULT_PAGE_SIZE = 50
+
 @chat_bp.route('/api/chat-sessions', methods=['POST'])
 @token_required
 def create_chat_session(current_user_id):
@@ -23,17 +27,72 @@ def create_chat_session(current_user_id):
     except Error:
         return jsonify(error='Failed to create chat session'), 500
 
+def _page_args(default_limit=DEFAULT_PAGE_SIZE):
+    """Read ?limit= (or legacy ?per_page=), ?cursor= and ?include_total= for keyset pagination.
+
+    limit is None (unbounded) only when default_limit is None and neither a
+    limit nor a cursor was given. Offset paging past page 1 is rejected.
+    """
+    if request.args.get('page', 1, type=int) > 1:
+        raise ValueError('page is no longer supported; follow pagination.next_cursor instead')
+    cursor = request.args.get('cursor')
+    if cursor and default_limit is None:
+        default_limit = DEFAULT_PAGE_SIZE
+    limit = request.args.get('limit', request.args.get('per_page', default_limit, type=int), type=int)
+    if limit is not None:
+        limit = max(1, min(limit, 200))
+    include_total = request.args.get('include_total', '').lower() in ('1', 'true')
+    return limit, (decode_cursor(cursor) if cursor else None), include_total
+
+def _keyset(column, after, newest_first):
+    """WHERE fragment and params for rows after the cursor position in (column, id) order.
+
+    The timestamp columns are nullable and MySQL sorts NULL first ascending
+    (last descending), so a NULL position and the NULL rows need their own terms.
+    """
+    if not after:
+        return "", ()
+    at, row_id = after
+    if newest_first:
+        if at is None:
+            return f"AND ({column} IS NULL AND id < %s)", (row_id,)
+        return (f"AND ({column} < %s OR ({column} = %s AND id < %s) OR {column} IS NULL)",
+                (at, at, row_id))
+    if at is None:
+        return f"AND (({column} IS NULL AND id > %s) OR {column} IS NOT NULL)", (row_id,)
+    return f"AND ({column} > %s OR ({column} = %s AND id > %s))", (at, at, row_id)
+
+def _page_info(rows, limit, time_key):
+    """Trim the look-ahead row and describe the page."""
+    has_more = limit is not None and len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1][time_key], rows[-1]['id']) if has_more else None
+    return rows, {'limit': limit, 'per_page': limit, 'has_more': has_more, 'next_cursor': next_cursor}
+
 @chat_bp.route('/api/chat-sessions', methods=['GET'])
 @token_required
 def get_chat_sessions(current_user_id):
+    try:
+        limit, after, include_total = _page_args(default_limit=None)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
-            cur.execute("""
+            # Newest first; the cursor is the last (start_time, id) already returned
+            keyset, keyset_params = _keyset('start_time', after, newest_first=True)
+            # Without limit or cursor the list stays unbounded, as existing clients expect
+            page, page_params = ("LIMIT %s", (limit + 1,)) if limit is not None else ("", ())
+            cur.execute(f"""
                 SELECT id, session_uuid, start_time, end_time, session_topic, summary
-                FROM chat_sessions WHERE user_id = %s
-                ORDER BY start_time DESC
-            """, (current_user_id,))
-            return jsonify(sessions=cur.fetchall()), 200
+                FROM chat_sessions WHERE user_id = %s {keyset}
+                ORDER BY start_time DESC, id DESC
+                {page}
+            """, (current_user_id, *keyset_params, *page_params))
+            sessions, pagination = _page_info(cur.fetchall(), limit, 'start_time')
+            if include_total:
+                cur.execute("SELECT COUNT(*) AS total FROM chat_sessions WHERE user_id = %s", (current_user_id,))
+                pagination['total'] = cur.fetchone()['total']
+            return jsonify(sessions=sessions, pagination=pagination), 200
     except Error:
         return jsonify(error='Failed to retrieve chat sessions'), 500
 
@@ -51,6 +110,7 @@ def delete_chat_session(current_user_id, session_uuid):
             cur.execute("DELETE FROM messages WHERE session_uuid = %s", (session_uuid,))
             cur.execute("DELETE FROM chat_sessions WHERE session_uuid = %s", (session_uuid,))
             conn.commit()
+        session_memories.drop(session_uuid)
         return jsonify(message='Chat session deleted successfully'), 200
     except Error:
         return jsonify(error='Failed to delete chat session'), 500
@@ -58,36 +118,61 @@ def delete_chat_session(current_user_id, session_uuid):
 @chat_bp.route('/api/chat-sessions/<session_uuid>/messages', methods=['GET'])
 @token_required
 def get_chat_messages(current_user_id, session_uuid):
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 50, type=int)
-    offset = (page - 1) * per_page
+    try:
+        limit, after, include_total = _page_args()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             cur.execute("SELECT 1 FROM chat_sessions WHERE user_id = %s AND session_uuid = %s",
                         (current_user_id, session_uuid))
             if not cur.fetchone():
                 return jsonify(error='Session not found'), 404
-            cur.execute("SELECT COUNT(*) as total FROM messages WHERE session_uuid = %s", (session_uuid,))
-            total = cur.fetchone()['total']
-            cur.execute("""
+            # Oldest first; the cursor is the last (created_at, id) already returned
+            keyset, keyset_params = _keyset('created_at', after, newest_first=False)
+            cur.execute(f"""
                 SELECT id, sender, content, created_at FROM messages
-                WHERE session_uuid = %s ORDER BY created_at ASC
-                LIMIT %s OFFSET %s
-            """, (session_uuid, per_page, offset))
-            return jsonify(messages=cur.fetchall(), pagination={
-                'page': page, 'per_page': per_page, 'total': total,
-                'pages': (total + per_page - 1) // per_page
-            }), 200
+                WHERE session_uuid = %s {keyset}
+                ORDER BY created_at ASC, id ASC
+                LIMIT %s
+            """, (session_uuid, *keyset_params, limit + 1))
+            messages, pagination = _page_info(cur.fetchall(), limit, 'created_at')
+            if include_total:
+                cur.execute("SELECT COUNT(*) as total FROM messages WHERE session_uuid = %s", (session_uuid,))
+                pagination['total'] = cur.fetchone()['total']
+            return jsonify(messages=messages, pagination=pagination), 200
     except Error:
         return jsonify(error='Failed to retrieve chat messages'), 500
 
+def _wants_stream():
+    return (request.args.get('stream', '').lower() in ('1', 'true')
+            or 'text/event-stream' in request.headers.get('Accept', ''))
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _save_reply(session_uuid, reply):
+    with create_db_connection() as conn, conn.cursor() as cur:
+        cur.execute("INSERT INTO messages (session_uuid, sender, content) VALUES (%s, 'assistant', %s)",
+                    (session_uuid, reply))
+        conn.commit()
+
+def _stream_reply(events):
+    """Relay stream_query events as SSE; the worker saves the reply even if the client leaves."""
+    yield _sse('progress', 'Message received')
+    for event, data in events:
+        yield _sse(event, {'response': data} if event == 'done' else data)
+
 @chat_bp.route('/api/chat-sessions/<session_uuid>/send', methods=['POST'])
 @token_required
 def send_chat_message(current_user_id, session_uuid):
     data = request.get_json() or {}
     if 'message' not in data:
         return jsonify(error='Message content required'), 400
+    stream = _wants_stream()
     try:
+        # Commit the user message and return the connection before the answer is
+        # generated; process_query checks out its own connections meanwhile.
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             cur.execute("SELECT end_time FROM chat_sessions WHERE user_id = %s AND session_uuid = %s",
                         (current_user_id, session_uuid))
@@ -98,13 +183,21 @@ def send_chat_message(current_user_id, session_uuid):
                 cur.execute("UPDATE chat_sessions SET end_time = NULL WHERE session_uuid = %s", (session_uuid,))
             cur.execute("INSERT INTO messages (session_uuid, sender, content) VALUES (%s, 'user', %s)",
                         (session_uuid, data['message']))
-            ai_response = process_query(data['message'], session_uuid)
-            cur.execute("INSERT INTO messages (session_uuid, sender, content) VALUES (%s, 'assistant', %s)",
-                        (session_uuid, ai_response))
             conn.commit()
-        return jsonify(message='Message sent', response=ai_response), 200
     except Error:
         return jsonify(error='Failed to send message'), 500
+    if stream:
+        events = stream_query(data['message'], session_uuid,
+                              on_reply=lambda reply: _save_reply(session_uuid, reply))
+        return Response(stream_with_context(_stream_reply(events)),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    ai_response = process_query(data['message'], session_uuid)
+    try:
+        _save_reply(session_uuid, ai_response)
+    except Error:
+        return jsonify(error='Failed to save the reply', response=ai_response), 500
+    return jsonify(message='Message sent', response=ai_response), 200
 
 @chat_bp.route('/api/chat-sessions/<session_uuid>/end', methods=['POST'])
 @token_required
@@ -123,26 +216,33 @@ def end_chat_session(current_user_id, session_uuid):
                 WHERE session_uuid = %s ORDER BY created_at ASC
             """, (session_uuid,))
             conversation = "\n".join(f"{m['sender']}: {m['content']}" for m in cur.fetchall())
-            prompt = f"""
-            Please summarize the following conversation between a user and an AI assistant 
-            about pregnancy, postpartum, or childcare. Focus on key topics discussed and 
-            any important advice given. Keep it concise (2-3 sentences max).
-
-            Conversation:
-            {conversation}
-            """
-            try:
-                summary = llm.invoke([
-                    SystemMessage(content="You are a helpful summarizer for healthcare conversations."),
-                    HumanMessage(content=prompt)
-                ]).content.strip()
-            except Exception:
-                summary = "Conversation summary unavailable"
-            topic = sess['session_topic']
-            if topic == "New chat":
-                generated = naive_topic(conversation)
-                if generated.lower() != "new chat":
-                    topic = generated
+    except Error:
+        return jsonify(error='Failed to end chat session'), 500
+
+    # The summary call takes seconds; no pooled connection is held across it.
+    prompt = f"""
+    Please summarize the following conversation between a user and an AI assistant 
+    about pregnancy, postpartum, or childcare. Focus on key topics discussed and 
+    any important advice given. Keep it concise (2-3 sentences max).
+
+    Conversation:
+    {conversation}
+    """
+    try:
+        summary = get_llm().invoke([
+            SystemMessage(content="You are a helpful summarizer for healthcare conversations."),
+            HumanMessage(content=prompt)
+        ]).content.strip()
+    except Exception:
+        summary = "Conversation summary unavailable"
+    topic = sess['session_topic']
+    if topic == "New chat":
+        generated = naive_topic(conversation)
+        if generated.lower() != "new chat":
+            topic = generated
+
+    try:
+        with create_db_connection() as conn, conn.cursor() as cur:
             cur.execute("""
                 UPDATE chat_sessions
                 SET end_time = CURRENT_TIMESTAMP, summary = %s, session_topic = %s
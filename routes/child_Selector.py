@@ -1,45 +1,18 @@
-from flask import Blueprint, jsonify, request, current_app
-from functools import wraps
-import jwt
+from flask import Blueprint, jsonify, request
 from typing import List, Dict
 import uuid
 from mysql.connector import Error  # Add this import
 from utils.db import create_db_connection  # Ensure this is imported for MySQL
+from utils.auth_utils import token_required
+from utils.current_child import get_current_child_id, invalidate_current_child
+from utils.current_child import set_current_child_id as cache_current_child
 
 children_selector_bp = Blueprint('children_selector', __name__)
 
-# Token required decorator (unchanged from previous fix)
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith('Bearer '):
-                token = auth_header.replace('Bearer ', '')
-            else:
-                return jsonify({'message': 'Invalid Authorization header format'}), 401
-        
-        if not token:
-            return jsonify({'message': 'Token is missing'}), 401
-        
-        try:
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user_id = data['sub']  # Use 'sub' for user ID
-        except jwt.ExpiredSignatureError:
-            return jsonify({'message': 'Token has expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'message': 'Token is invalid'}), 401
-        except Exception as e:
-            return jsonify({'message': f'Token validation error: {str(e)}'}), 401
-            
-        return f(current_user_id, *args, **kwargs)
-    return decorated
-
 # GET /api/children (updated for MySQL)
 @children_selector_bp.route('/api/children', methods=['GET'])
-@token_required
-def get_children(current_user_id: str):
+@token_required(error_key='message')
+def get_children(current_user_id: int):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             cur.execute("""
@@ -47,9 +20,7 @@ def get_children(current_user_id: str):
                 FROM children WHERE user_id = %s
             """, (current_user_id,))
             children = cur.fetchall()
-            cur.execute("SELECT current_child_id FROM users WHERE id = %s", (current_user_id,))
-            user = cur.fetchone()
-            current_child_id = user['current_child_id'] if user and user['current_child_id'] else None
+            current_child_id = get_current_child_id(current_user_id, cur) or None
         return jsonify({
             'children': children,
             'currentChildId': current_child_id
@@ -59,8 +30,8 @@ def get_children(current_user_id: str):
 
 # POST /api/children (updated for MySQL)
 @children_selector_bp.route('/api/children', methods=['POST'])
-@token_required
-def add_child(current_user_id: str):
+@token_required(error_key='message')
+def add_child(current_user_id: int):
     data = request.get_json()
     if not data or not data.get('full_name'):
         return jsonify({'message': 'Child full name is required'}), 400
@@ -82,17 +53,18 @@ def add_child(current_user_id: str):
                 data.get('genetic_conditions')
             ))
             conn.commit()
-            if not current_child_db.get(current_user_id):
+            if not get_current_child_id(current_user_id, cur):
                 cur.execute("UPDATE users SET current_child_id = %s WHERE id = %s", (child_id, current_user_id))
                 conn.commit()
+                cache_current_child(current_user_id, child_id)
         return jsonify({'message': 'Child added successfully', 'child': { 'id': child_id, **data }}), 201
     except Error as e:
         return jsonify({'message': f'Error adding child: {str(e)}'}), 500
 
 # PUT /api/children/current (fixed with Error import)
 @children_selector_bp.route('/api/children/current', methods=['PUT'])
-@token_required
-def set_current_child_id(current_user_id: str):
+@token_required(error_key='message')
+def set_current_child_id(current_user_id: int):
     data = request.get_json()
     if not data or not data.get('currentChildId'):
         return jsonify({'message': 'Current child ID is required'}), 400
@@ -103,6 +75,7 @@ def set_current_child_id(current_user_id: str):
                 return jsonify({'message': 'Invalid child ID'}), 400
             cur.execute("UPDATE users SET current_child_id = %s WHERE id = %s", (data['currentChildId'], current_user_id))
             conn.commit()
+            invalidate_current_child(current_user_id)
         return jsonify({'message': 'Current child updated successfully', 'currentChildId': data['currentChildId']}), 200
     except Error as e:
         return jsonify({'message': f'Error updating current child: {str(e)}'}), 500
\ No newline at end of file
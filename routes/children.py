@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from utils.db import create_db_connection
 from utils.auth_utils import token_required
+from utils.versions import bump_version, CHILD_SCOPES
 from mysql.connector import Error
 
 children_bp = Blueprint('children', __name__)
@@ -63,6 +64,8 @@ def delete_child(current_user_id, child_id):
             if not cur.fetchone():
                 return jsonify(error='Child not found or unauthorized'), 404
             cur.execute("DELETE FROM children WHERE id = %s", (child_id,))
+            for scope in CHILD_SCOPES:
+                bump_version(cur, scope, child_id)
             conn.commit()
         return jsonify(message='Child deleted successfully'), 200
     except Error:
@@ -0,0 +1,92 @@
+from flask import Blueprint, request, jsonify
+from utils.db import create_db_connection
+from utils.auth_utils import token_required
+from utils.current_child import set_current_child_id
+from routes.settings import FONT_SIZE_REVERSE_MAP
+from routes.calendar import calendar_window
+from utils.vaccine_schedule import ACTIONABLE, children_schedules
+from mysql.connector import Error
+import datetime
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+SECTIONS = ('trackers', 'current_child', 'vaccinations', 'vaccines_due', 'health_records', 'calendar_events',
+            'settings')
+CALENDAR_DAYS = 7  # calendar_events covers today and the next six days, recurring series expanded
+
+@dashboard_bp.route('/api/dashboard', methods=['GET'])
+@token_required
+def get_dashboard(current_user_id):
+    """Everything the home page needs in one request and one connection.
+
+    ?include=trackers,vaccinations,... picks sections (default: all). Each
+    section has the same shape as its standalone endpoint.
+    """
+    include = request.args.get('include')
+    sections = set(SECTIONS) if not include else {s.strip() for s in include.split(',') if s.strip()}
+    unknown = sections - set(SECTIONS)
+    if unknown:
+        return jsonify(error=f"Unknown sections: {', '.join(sorted(unknown))}"), 400
+
+    result = {}
+    today = datetime.date.today()
+    try:
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            # Settings, the selected child and today's trackers come from one row
+            cur.execute("""
+                SELECT u.dark_mode, u.font_size, u.current_child_id,
+                       c.id AS child_id, c.full_name AS child_name,
+                       COALESCE(ht.sleep_hours, 0.0) AS sleep_hours,
+                       COALESCE(ht.water_intake, 0.0) AS water_intake,
+                       COALESCE(ht.steps, 0) AS steps
+                FROM users u
+                LEFT JOIN children c ON c.id = u.current_child_id AND c.user_id = u.id
+                LEFT JOIN health_tracking ht ON ht.user_id = u.id AND ht.track_date = %s
+                WHERE u.id = %s
+            """, (today.isoformat(), current_user_id))
+            user = cur.fetchone()
+            if not user:
+                return jsonify(error="User not found"), 404
+            set_current_child_id(current_user_id, user['current_child_id'])
+            child_id = user['child_id']
+
+            if 'settings' in sections:
+                result['settings'] = {
+                    'dark_mode': bool(user['dark_mode']),
+                    'font_size': FONT_SIZE_REVERSE_MAP.get(user['font_size'], 'normal')
+                }
+            if 'trackers' in sections:
+                result['trackers'] = {k: user[k] for k in ('sleep_hours', 'water_intake', 'steps')}
+            if 'current_child' in sections:
+                result['current_child'] = {'id': child_id, 'full_name': user['child_name']} if child_id else None
+
+            if 'vaccinations' in sections:
+                result['vaccinations'] = []
+                if child_id:
+                    cur.execute("""
+                        SELECT id, child_id, vaccination_name AS name, date_received AS date,
+                               next_due_date AS nextDue, notes, created_at, updated_at
+                        FROM child_vaccinations
+                        WHERE child_id = %s
+                        ORDER BY date_received DESC
+                    """, (child_id,))
+                    result['vaccinations'] = cur.fetchall()
+            if 'vaccines_due' in sections:
+                result['vaccines_due'] = children_schedules(cur, current_user_id, statuses=ACTIONABLE)
+            if 'health_records' in sections:
+                result['health_records'] = []
+                if child_id:
+                    cur.execute("""
+                        SELECT id, child_id, record_date as date, record_type as type, title,
+                               dosage, priority, parent_notes as notes
+                        FROM child_health_records
+                        WHERE child_id = %s
+                        ORDER BY record_date DESC
+                    """, (child_id,))
+                    result['health_records'] = cur.fetchall()
+            if 'calendar_events' in sections:
+                result['calendar_events'] = calendar_window(
+                    cur, current_user_id, today, today + datetime.timedelta(days=CALENDAR_DAYS - 1))
+        return jsonify(result), 200
+    except Error as e:
+        return jsonify(error=f'Failed to load dashboard: {str(e)}'), 500
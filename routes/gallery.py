@@ -1,14 +1,85 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify, send_file
 from utils.db import create_db_connection
 from utils.auth_utils import token_required
 from utils.helpers import allowed_image
-from werkzeug.utils import secure_filename
-from mysql.connector import Error
+from utils.uploads import (CHUNK_SIZE, MAX_CHUNK_BYTES, MAX_CHUNKS, start_upload, load_upload,
+                           write_chunk, received_chunks, assemble_upload, hash_stream, store_content,
+                           discard_upload)
+from utils.storage import get_storage, media_url, key_from_name
+from utils.thumbnails import schedule_derivatives, resolve_size, remove_derivatives, IMAGE_SIZES
+from utils.versions import bump_version, get_etag, is_fresh, not_modified, with_etag
+from mysql.connector import Error, IntegrityError
+from contextlib import contextmanager
+import hashlib
+import mimetypes
 import os
-import uuid
 
 gallery_bp = Blueprint('gallery', __name__)
 
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+CONTENT_LOCK_TIMEOUT = int(os.environ.get('MEDIA_LOCK_TIMEOUT', 10))
+
+@contextmanager
+def _content_lock(cur, content_id):
+    """Serialize storing and deleting one shared file across users and workers.
+
+    Rows of different users point at the same content-addressed file, so the
+    "is anyone still using it" check and the unlink/put must not interleave.
+    """
+    # GET_LOCK names are capped at 64 characters
+    name = 'media:' + hashlib.sha1(content_id.encode()).hexdigest()
+    cur.execute("SELECT GET_LOCK(%s, %s)", (name, CONTENT_LOCK_TIMEOUT))
+    if cur.fetchone()[0] != 1:
+        raise Error(msg="Timed out waiting for the media content lock")
+    try:
+        yield
+    finally:
+        cur.execute("SELECT RELEASE_LOCK(%s)", (name,))
+        cur.fetchone()
+
+def _store_media(user_id, tmp_path, content_hash, filename, description):
+    """Record a hashed upload, reusing the user's existing copy of identical content."""
+    try:
+        with create_db_connection() as conn, conn.cursor() as cur, _content_lock(cur, content_hash):
+            cur.execute("""
+                SELECT id FROM user_media WHERE user_id = %s AND content_hash = %s
+            """, (user_id, content_hash))
+            existing = cur.fetchone()
+            if existing:
+                os.remove(tmp_path)
+                return jsonify(message="Image already uploaded", media_id=existing[0], duplicate=True), 200
+            key, created = store_content(tmp_path, content_hash, filename)
+            try:
+                cur.execute("""
+                    INSERT INTO user_media (user_id, image_url, description, uploaded_at, content_hash)
+                    VALUES (%s, %s, %s, NOW(), %s)
+                """, (user_id, media_url(key), description, content_hash))
+                media_id = cur.lastrowid
+                bump_version(cur, 'media', user_id)
+                conn.commit()
+            except Error as e:
+                # The content lock keeps other users' rows for this file stable;
+                # on an IntegrityError our own concurrent upload's row owns it.
+                conn.rollback()
+                if created and not isinstance(e, IntegrityError):
+                    cur.execute("SELECT 1 FROM user_media WHERE image_url = %s LIMIT 1", (media_url(key),))
+                    if cur.fetchone() is None:
+                        get_storage().delete(key)
+                raise
+        schedule_derivatives(key)
+        return jsonify(message="Image uploaded successfully", media_id=media_id), 201
+    except IntegrityError:
+        # Same content finished uploading concurrently; hand back that row
+        with create_db_connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT id FROM user_media WHERE user_id = %s AND content_hash = %s",
+                        (user_id, content_hash))
+            row = cur.fetchone()
+        return jsonify(message="Image already uploaded", media_id=row[0] if row else None, duplicate=True), 200
+    except Error as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return jsonify(error=f"Database error: {str(e)}"), 500
+
 @gallery_bp.route('/api/user-media', methods=['POST'])
 @token_required
 def upload_image(current_user_id):
@@ -20,33 +91,71 @@ def upload_image(current_user_id):
     if not allowed_image(file.filename):
         return jsonify(error="Only image files are allowed"), 400
     description = request.form.get('description', '')
-    filename = secure_filename(file.filename)
-    unique_suffix = str(uuid.uuid4())[:8]
-    filename_with_uuid = f"{unique_suffix}_{filename}"
-    upload_folder = os.environ.get('UPLOAD_FOLDER', 'uploads')
-    os.makedirs(upload_folder, exist_ok=True)
-    filepath = os.path.join(upload_folder, filename_with_uuid)
-    file.save(filepath)
-    image_url = filepath
     try:
-        with create_db_connection() as conn, conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO user_media (user_id, image_url, description, uploaded_at)
-                VALUES (%s, %s, %s, NOW())
-            """, (current_user_id, image_url, description))
-            conn.commit()
-            media_id = cur.lastrowid
-        return jsonify(message="Image uploaded successfully", media_id=media_id), 201
-    except Error as e:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-        return jsonify(error=f"Database error: {str(e)}"), 500
+        tmp_path, content_hash, _ = hash_stream(file.stream)
+    except ValueError as e:
+        return jsonify(error=str(e)), 413
+    return _store_media(current_user_id, tmp_path, content_hash, file.filename, description)
+
+# ── Resumable uploads: start, PUT numbered chunks, then complete ─────────
+@gallery_bp.route('/api/user-media/uploads', methods=['POST'])
+@token_required
+def start_chunked_upload(current_user_id):
+    data = request.get_json() or {}
+    filename = data.get('filename', '')
+    if not filename or not allowed_image(filename):
+        return jsonify(error="Only image files are allowed"), 400
+    upload_id = start_upload(current_user_id, filename, data.get('description', ''))
+    return jsonify(upload_id=upload_id, chunk_size=CHUNK_SIZE, max_chunk_bytes=MAX_CHUNK_BYTES), 201
+
+@gallery_bp.route('/api/user-media/uploads/<upload_id>', methods=['GET'])
+@token_required
+def get_chunked_upload(current_user_id, upload_id):
+    """Which chunks the server has, so a client can resume after a dropped connection."""
+    if not load_upload(upload_id, current_user_id):
+        return jsonify(error="Upload not found"), 404
+    return jsonify(upload_id=upload_id, received=received_chunks(upload_id)), 200
+
+@gallery_bp.route('/api/user-media/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+@token_required
+def put_upload_chunk(current_user_id, upload_id, index):
+    if not load_upload(upload_id, current_user_id):
+        return jsonify(error="Upload not found"), 404
+    if index >= MAX_CHUNKS:
+        return jsonify(error="Chunk index out of range"), 400
+    try:
+        size = write_chunk(upload_id, index, request.stream)
+    except ValueError as e:
+        return jsonify(error=str(e)), 413
+    return jsonify(index=index, size=size), 200
+
+@gallery_bp.route('/api/user-media/uploads/<upload_id>/complete', methods=['POST'])
+@token_required
+def complete_chunked_upload(current_user_id, upload_id):
+    manifest = load_upload(upload_id, current_user_id)
+    if not manifest:
+        return jsonify(error="Upload not found"), 404
+    total = (request.get_json() or {}).get('total_chunks')
+    if not isinstance(total, int) or total < 1:
+        return jsonify(error="total_chunks is required"), 400
+    try:
+        tmp_path, content_hash, _ = assemble_upload(upload_id, total)
+    except ValueError as e:
+        return jsonify(error=str(e), received=received_chunks(upload_id)), 400
+    response = _store_media(current_user_id, tmp_path, content_hash,
+                            manifest['filename'], manifest['description'])
+    if response[1] != 500:
+        discard_upload(upload_id)
+    return response
 
 @gallery_bp.route('/api/user-media', methods=['GET'])
 @token_required
 def get_user_images(current_user_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            etag = get_etag(cur, 'media', current_user_id)
+            if is_fresh(etag):
+                return not_modified(etag)
             cur.execute("""
                 SELECT id, image_url, description, uploaded_at
                 FROM user_media
@@ -54,7 +163,7 @@ def get_user_images(current_user_id):
                 ORDER BY uploaded_at DESC
             """, (current_user_id,))
             images = cur.fetchall()
-        return jsonify(images=images), 200
+        return with_etag(jsonify(images=images), etag), 200
     except Error as e:
         return jsonify(error='Failed to retrieve images'), 500
 
@@ -64,22 +173,50 @@ def delete_user_image(current_user_id, media_id):
     try:
         with create_db_connection() as conn, conn.cursor() as cur:
             cur.execute("""
-                SELECT image_url FROM user_media
+                SELECT image_url, content_hash FROM user_media
                 WHERE id = %s AND user_id = %s
             """, (media_id, current_user_id))
             row = cur.fetchone()
             if not row:
                 return jsonify(error="Image not found or unauthorized"), 404
-            image_url = row[0]
-            cur.execute("DELETE FROM user_media WHERE id = %s", (media_id,))
-            conn.commit()
-        if os.path.exists(image_url):
-            os.remove(image_url)
+            image_url, content_hash = row
+            # Content-addressed files are shared by every row with the same bytes;
+            # hold the lock until the file is gone so no upload can reuse it meanwhile
+            with _content_lock(cur, content_hash or image_url):
+                cur.execute("DELETE FROM user_media WHERE id = %s", (media_id,))
+                # A locking read sees rows committed after our first SELECT's snapshot
+                cur.execute("SELECT 1 FROM user_media WHERE image_url = %s LIMIT 1 FOR SHARE", (image_url,))
+                still_used = cur.fetchone() is not None
+                bump_version(cur, 'media', current_user_id)
+                conn.commit()
+                if not still_used:
+                    key = key_from_name(image_url)
+                    get_storage().delete(key)
+                    remove_derivatives(key)
         return jsonify(message="Image deleted successfully"), 200
     except Error as e:
         return jsonify(error='Failed to delete image'), 500
 
-@gallery_bp.route('/uploads/<filename>')
+@gallery_bp.route('/uploads/<path:filename>')
 def serve_image(filename):
-    upload_folder = os.environ.get('UPLOAD_FOLDER', 'uploads')
-    return send_from_directory(upload_folder, filename)
+    """Serve by image_url path or bare file name (either resolves to the same key).
+
+    ?size=thumb|medium serves a derived size, falling back to the original while it is generated.
+    """
+    key = key_from_name(filename)
+    size = request.args.get('size')
+    if size and size != 'original':
+        if size not in IMAGE_SIZES:
+            return jsonify(error=f"Unknown size; use one of: original, {', '.join(IMAGE_SIZES)}"), 400
+        key = resolve_size(key, size)
+    try:
+        path = get_storage().local_path(key)
+    except ValueError:
+        return jsonify(error="Not found"), 404
+    if not os.path.isfile(path):
+        return jsonify(error="Not found"), 404
+    # Content-addressed originals never change, so clients may cache them for good
+    # (a ?size= response may be the original standing in for a pending derivative)
+    immutable = key.count('/') == 2 and size in (None, '', 'original')
+    return send_file(path, mimetype=mimetypes.guess_type(key)[0],
+                     max_age=IMMUTABLE_MAX_AGE if immutable else None)
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from utils.db import create_db_connection
 from utils.auth_utils import token_required
+from utils.current_child import get_current_child_id
+from utils.versions import bump_version, get_etag, is_fresh, not_modified, with_etag
 from mysql.connector import Error
 import datetime
 
@@ -12,14 +14,9 @@ def get_current_child(current_user_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             # First get the current_child_id from users table
-            cur.execute("""
-                SELECT current_child_id
-                FROM users
-                WHERE id = %s
-            """, (current_user_id,))
-            user = cur.fetchone()
+            child_id = get_current_child_id(current_user_id, cur)
             
-            if not user or not user['current_child_id']:
+            if not child_id:
                 return jsonify(error='No child selected. Please select a child first.'), 404
                 
             # Then get the child details
@@ -27,7 +24,7 @@ def get_current_child(current_user_id):
                 SELECT id, full_name
                 FROM children
                 WHERE id = %s AND user_id = %s
-            """, (user['current_child_id'], current_user_id))
+            """, (child_id, current_user_id))
             child = cur.fetchone()
             
             if not child:
@@ -48,14 +45,9 @@ def add_health_record(current_user_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             # First get the current_child_id from users table
-            cur.execute("""
-                SELECT current_child_id
-                FROM users
-                WHERE id = %s
-            """, (current_user_id,))
-            user = cur.fetchone()
+            child_id = get_current_child_id(current_user_id, cur)
             
-            if not user or not user['current_child_id']:
+            if not child_id:
                 return jsonify(error='No child selected. Please select a child first.'), 400
                 
             # Then insert the health record
@@ -66,7 +58,7 @@ def add_health_record(current_user_id):
                 )
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (
-                user['current_child_id'],  # Use current_child_id from users table
+                child_id,  # Use current_child_id from users table
                 data.get('date', datetime.date.today().isoformat()),
                 data['record_type'],
                 data['title'],
@@ -76,8 +68,9 @@ def add_health_record(current_user_id):
                 datetime.datetime.now(),
                 datetime.datetime.now()
             ))
-            conn.commit()
             record_id = cur.lastrowid
+            bump_version(cur, 'health_records', child_id)
+            conn.commit()
         return jsonify(message='Health record added successfully', record_id=record_id), 201
     except Error as e:
         return jsonify(error=f'Failed to add health record: {str(e)}'), 500
@@ -88,15 +81,14 @@ def get_health_records(current_user_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             # First get the current_child_id from users table
-            cur.execute("""
-                SELECT current_child_id
-                FROM users
-                WHERE id = %s
-            """, (current_user_id,))
-            user = cur.fetchone()
+            child_id = get_current_child_id(current_user_id, cur)
             
-            if not user or not user['current_child_id']:
+            if not child_id:
                 return jsonify(error='No child selected. Please select a child first.'), 404
+
+            etag = get_etag(cur, 'health_records', child_id)
+            if is_fresh(etag):
+                return not_modified(etag)
                 
             # Then get the health records
             cur.execute("""
@@ -105,9 +97,9 @@ def get_health_records(current_user_id):
                 FROM child_health_records 
                 WHERE child_id = %s
                 ORDER BY record_date DESC
-            """, (user['current_child_id'],))
+            """, (child_id,))
             records = cur.fetchall()
-        return jsonify(records=records), 200
+        return with_etag(jsonify(records=records), etag), 200
     except Error as e:
         return jsonify(error=f'Failed to fetch health records: {str(e)}'), 500
 
@@ -134,6 +126,7 @@ def delete_health_record(current_user_id, record_id):
                 DELETE FROM child_health_records
                 WHERE id = %s
             """, (record_id,))
+            bump_version(cur, 'health_records', record['child_id'])
             conn.commit()
 
             return jsonify(message='Health record deleted successfully'), 200
@@ -0,0 +1,214 @@
+from flask import Blueprint, request, jsonify
+from utils.db import create_db_connection
+from utils.auth_utils import token_required
+from utils.current_child import get_current_child_id
+from utils.versions import bump_version
+from utils.tracker_rollups import refresh_rollups
+from utils.reminders import refresh_vaccination
+from mysql.connector import Error
+import datetime
+import json
+
+sync_bp = Blueprint('sync', __name__)
+
+MAX_BATCH = 500
+TRACKER_FIELDS = ['water_intake', 'sleep_hours', 'steps']
+GROWTH_FIELDS = ['weight', 'height', 'head_circumference', 'notes']
+# Child-scoped tables and the list version (ETag) each one feeds
+TABLE_SCOPES = {
+    'baby_growth_records': 'baby_growth',
+    'child_vaccinations': 'vaccinations',
+    'child_health_records': 'health_records',
+}
+
+def _day(value):
+    """Offline mutations carry the day they happened; default to today."""
+    if value is None:
+        return datetime.date.today().isoformat()
+    day = datetime.date.fromisoformat(str(value))
+    if day > datetime.date.today():
+        raise ValueError('date is in the future')
+    return day.isoformat()
+
+def _upsert_sql(table, key_columns, columns):
+    all_columns = key_columns + columns
+    return f"""
+        INSERT INTO {table} ({', '.join(all_columns)})
+        VALUES ({', '.join(['%s'] * len(all_columns))}) AS new
+        ON DUPLICATE KEY UPDATE {', '.join(f'{c} = new.{c}' for c in columns)}
+    """
+
+def _plan(mutation, user_id, child_id):
+    """Validate one mutation and return ('upsert' | 'insert', table, sql, params).
+
+    Raises ValueError with a client-facing message when the mutation is invalid.
+    """
+    kind = mutation.get('type')
+    data = mutation.get('data') or {}
+    if not isinstance(data, dict):
+        raise ValueError('data must be an object')
+    if kind == 'trackers':
+        fields = [f for f in TRACKER_FIELDS if data.get(f) is not None]
+        if not fields:
+            raise ValueError('At least one of water_intake, sleep_hours, steps is required')
+        sql = _upsert_sql('health_tracking', ['user_id', 'track_date'], fields)
+        return 'upsert', 'health_tracking', sql, (user_id, _day(data.get('date')), *[data[f] for f in fields])
+    if kind in ('baby_growth', 'vaccination', 'health_record') and not child_id:
+        raise ValueError('No child selected. Please select a child first.')
+    if kind == 'baby_growth':
+        fields = [f for f in GROWTH_FIELDS if f in data]
+        if not fields:
+            raise ValueError('At least one field (weight, height, head_circumference, notes) is required')
+        sql = _upsert_sql('baby_growth_records', ['child_id', 'record_date'], fields + ['created_at'])
+        return 'upsert', 'baby_growth_records', sql, (
+            child_id, _day(data.get('date')), *[data[f] for f in fields], datetime.datetime.now())
+    if kind == 'vaccination':
+        if not all(k in data for k in ['name', 'date']):
+            raise ValueError('Missing required fields: name, date')
+        now = datetime.datetime.now()
+        return 'insert', 'child_vaccinations', """
+            INSERT INTO child_vaccinations (
+                child_id, vaccination_name, date_received, next_due_date, notes,
+                created_at, updated_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (child_id, data['name'], data['date'], data.get('nextDue'), data.get('notes'), now, now)
+    if kind == 'health_record':
+        if not all(k in data for k in ['record_type', 'title']):
+            raise ValueError('Missing required fields: record_type, title')
+        now = datetime.datetime.now()
+        return 'insert', 'child_health_records', """
+            INSERT INTO child_health_records (
+                child_id, record_date, record_type, title, dosage, priority, parent_notes,
+                created_at, updated_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (child_id, data.get('date', datetime.date.today().isoformat()), data['record_type'],
+              data['title'], data.get('dosage'), data.get('priority', 'medium'), data.get('notes'), now, now)
+    raise ValueError(f"Unknown mutation type: {kind}")
+
+def _isolated(cur, run, savepoint='sync_item'):
+    """Run one item's statements under a savepoint; on a DB error undo only them and return it."""
+    cur.execute(f"SAVEPOINT {savepoint}")
+    try:
+        run()
+    except Error as e:
+        cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+        return e
+    cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+    return None
+
+@sync_bp.route('/api/sync', methods=['POST'])
+@token_required
+def sync_mutations(current_user_id):
+    """Apply an ordered batch of offline mutations in one transaction.
+
+    Body: {"mutations": [{"key": "<idempotency key>", "type": "trackers" |
+    "baby_growth" | "vaccination" | "health_record", "data": {...}}, ...]}.
+    Each item gets a result; items whose key was already applied return the
+    stored result with status "duplicate". Items run under savepoints, so one
+    that the database rejects gets status "error" and the rest still apply.
+    """
+    mutations = (request.get_json() or {}).get('mutations')
+    if not isinstance(mutations, list) or not mutations:
+        return jsonify(error='mutations must be a non-empty list'), 400
+    if len(mutations) > MAX_BATCH:
+        return jsonify(error=f'At most {MAX_BATCH} mutations per batch'), 400
+
+    results = [None] * len(mutations)
+    try:
+        with create_db_connection() as conn, conn.cursor() as cur:
+            keys = list({m['key'] for m in mutations
+                         if isinstance(m, dict) and isinstance(m.get('key'), str) and m['key']})
+            applied = {}
+            if keys:
+                cur.execute(f"""
+                    SELECT idempotency_key, result FROM sync_mutations
+                    WHERE user_id = %s AND idempotency_key IN ({', '.join(['%s'] * len(keys))})
+                """, (current_user_id, *keys))
+                applied = {key: json.loads(result) for key, result in cur.fetchall()}
+
+            needs_child = any(isinstance(m, dict) and m.get('type') != 'trackers' for m in mutations)
+            child_id = get_current_child_id(current_user_id, cur) if needs_child else None
+
+            def apply_one(i, sql, params, returns_id=False):
+                def run():
+                    cur.execute(sql, params)
+                    if returns_id:  # read before RELEASE SAVEPOINT resets lastrowid
+                        results[i]['id'] = cur.lastrowid
+                error = _isolated(cur, run)
+                if error is not None:
+                    results[i] = dict(results[i], status='error', error=str(error))
+
+            # Upserts are batched per table with executemany; a run is flushed when
+            # the column set changes so later writes still win over earlier ones.
+            # A batch the database rejects is replayed item by item to find the culprits.
+            pending = {}  # table -> (sql, [params], [item index])
+            def flush(table):
+                sql, rows, items = pending.pop(table)
+                if _isolated(cur, lambda: cur.executemany(sql, rows), 'sync_batch') is not None:
+                    for i, params in zip(items, rows):
+                        apply_one(i, sql, params)
+
+            new_keys = {}  # key -> index of the item that applies it
+            repeats = {}   # index -> index of the earlier item in this batch with the same key
+            tables = {}    # index -> table written
+            tracker_days = set()
+            for i, mutation in enumerate(mutations):
+                if not isinstance(mutation, dict):
+                    results[i] = dict(status='error', error='Mutation must be an object')
+                    continue
+                key = mutation.get('key')
+                if key is not None and (not isinstance(key, str) or not key or len(key) > 64):
+                    results[i] = dict(key=key, status='error', error='key must be a string of 1-64 characters')
+                    continue
+                if key in applied:
+                    results[i] = dict(applied[key], key=key, status='duplicate')
+                    continue
+                if key in new_keys:
+                    repeats[i] = new_keys[key]
+                    continue
+                try:
+                    kind, table, sql, params = _plan(mutation, current_user_id, child_id)
+                except (ValueError, TypeError) as e:
+                    results[i] = dict(key=key, status='error', error=str(e))
+                    continue
+                tables[i] = table
+                if table == 'health_tracking':
+                    tracker_days.add(params[1])
+                results[i] = dict(key=key, status='applied')
+                if kind == 'upsert':
+                    if table in pending and pending[table][0] != sql:
+                        flush(table)
+                    batch = pending.setdefault(table, (sql, [], []))
+                    batch[1].append(params)
+                    batch[2].append(i)
+                else:
+                    apply_one(i, sql, params, returns_id=True)
+                if key is not None:
+                    new_keys[key] = i
+            for table in list(pending):
+                flush(table)
+
+            for i, first in repeats.items():
+                results[i] = dict(results[first], status='duplicate' if results[first]['status'] == 'applied' else 'error')
+            done = [i for i in tables if results[i]['status'] == 'applied']
+            refresh_rollups(cur, current_user_id, tracker_days)
+            for table in {tables[i] for i in done} & TABLE_SCOPES.keys():
+                bump_version(cur, TABLE_SCOPES[table], child_id)
+            new_vaccinations = [results[i]['id'] for i in done if tables[i] == 'child_vaccinations']
+
+            recorded = [(key, i) for key, i in new_keys.items() if results[i]['status'] == 'applied']
+            if recorded:
+                cur.executemany("""
+                    INSERT INTO sync_mutations (user_id, idempotency_key, result)
+                    VALUES (%s, %s, %s)
+                """, [(current_user_id, key,
+                       json.dumps({k: v for k, v in results[i].items() if k not in ('key', 'status')}))
+                      for key, i in recorded])
+            conn.commit()
+        for vaccination_id in new_vaccinations:
+            refresh_vaccination(vaccination_id)
+        return jsonify(results=results), 200
+    except Error as e:
+        return jsonify(error=f'Failed to apply mutations: {str(e)}'), 500
@@ -1,92 +1,68 @@
 from flask import Blueprint, request, jsonify
 from utils.db import create_db_connection
 from utils.auth_utils import token_required
+from utils.tracker_rollups import GRANULARITIES, refresh_rollups, period_starts, tracker_history
 from mysql.connector import Error
 import datetime
-from functools import wraps
+from itertools import islice
 
 trackers_bp = Blueprint('trackers', __name__)
 
-def ensure_today_record(f):
-    @wraps(f)
-    def decorated(current_user_id, *args, **kwargs):
-        today = datetime.date.today().isoformat()
-        try:
-            with create_db_connection() as conn, conn.cursor() as cur:
-                cur.execute("""
-                    SELECT id FROM health_tracking
-                    WHERE user_id = %s AND track_date = %s
-                """, (current_user_id, today))
-                if not cur.fetchone():
-                    cur.execute("""
-                        INSERT INTO health_tracking (user_id, track_date, sleep_hours, water_intake, steps)
-                        VALUES (%s, %s, 0.0, 0.0, 0)
-                    """, (current_user_id, today))
-                    conn.commit()
-        except Error:
-            pass
-        return f(current_user_id, *args, **kwargs)
-    return decorated
+TRACKER_FIELDS = ('water_intake', 'sleep_hours', 'steps')
+
+def upsert_today(current_user_id, fields):
+    """Write today's tracker values in one statement, creating the row if needed.
+
+    Relies on the unique (user_id, track_date) key; columns not in `fields`
+    keep their stored value (NULL on a new row). Today's week and month
+    rollups are refreshed in the same transaction.
+    """
+    today = datetime.date.today().isoformat()
+    columns = list(fields)
+    with create_db_connection() as conn, conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO health_tracking (user_id, track_date, {', '.join(columns)})
+            VALUES (%s, %s, {', '.join(['%s'] * len(columns))}) AS new
+            ON DUPLICATE KEY UPDATE {', '.join(f'{c} = new.{c}' for c in columns)}
+        """, (current_user_id, today, *fields.values()))
+        refresh_rollups(cur, current_user_id, [today])
+        conn.commit()
 
 @trackers_bp.route('/api/trackers/water', methods=['PATCH'])
 @token_required
-@ensure_today_record
 def update_water(current_user_id):
     data = request.get_json() or {}
     water = data.get('water_intake')
     if water is None:
         return jsonify(error="water_intake is required"), 400
-    today = datetime.date.today().isoformat()
     try:
-        with create_db_connection() as conn, conn.cursor() as cur:
-            cur.execute("""
-                UPDATE health_tracking
-                SET water_intake = %s
-                WHERE user_id = %s AND track_date = %s
-            """, (water, current_user_id, today))
-            conn.commit()
+        upsert_today(current_user_id, {'water_intake': water})
         return jsonify(message="Water intake updated"), 200
     except Error:
         return jsonify(error="Failed to update water intake"), 500
 
 @trackers_bp.route('/api/trackers/sleep', methods=['PATCH'])
 @token_required
-@ensure_today_record
 def update_sleep(current_user_id):
     data = request.get_json() or {}
     sleep = data.get('sleep_hours')
     if sleep is None:
         return jsonify(error="sleep_hours is required"), 400
-    today = datetime.date.today().isoformat()
     try:
-        with create_db_connection() as conn, conn.cursor() as cur:
-            cur.execute("""
-                UPDATE health_tracking
-                SET sleep_hours = %s
-                WHERE user_id = %s AND track_date = %s
-            """, (sleep, current_user_id, today))
-            conn.commit()
+        upsert_today(current_user_id, {'sleep_hours': sleep})
         return jsonify(message="Sleep hours updated"), 200
     except Error:
         return jsonify(error="Failed to update sleep hours"), 500
 
 @trackers_bp.route('/api/trackers/steps', methods=['PATCH'])
 @token_required
-@ensure_today_record
 def update_steps(current_user_id):
     data = request.get_json() or {}
     steps = data.get('steps')
     if steps is None:
         return jsonify(error="steps is required"), 400
-    today = datetime.date.today().isoformat()
     try:
-        with create_db_connection() as conn, conn.cursor() as cur:
-            cur.execute("""
-                UPDATE health_tracking
-                SET steps = %s
-                WHERE user_id = %s AND track_date = %s
-            """, (steps, current_user_id, today))
-            conn.commit()
+        upsert_today(current_user_id, {'steps': steps})
         return jsonify(message="Steps updated"), 200
     except Error:
         return jsonify(error="Failed to update steps"), 500
@@ -98,7 +74,9 @@ def get_today_tracker(current_user_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             cur.execute("""
-                SELECT sleep_hours, water_intake, steps
+                SELECT COALESCE(sleep_hours, 0.0) AS sleep_hours,
+                       COALESCE(water_intake, 0.0) AS water_intake,
+                       COALESCE(steps, 0) AS steps
                 FROM health_tracking
                 WHERE user_id = %s AND track_date = %s
             """, (current_user_id, today))
@@ -111,58 +89,55 @@ def get_today_tracker(current_user_id):
 
 @trackers_bp.route('/api/trackers/all', methods=['PATCH'])
 @token_required
-@ensure_today_record
 def update_all_trackers(current_user_id):
     data = request.get_json() or {}
-    water = data.get('water_intake', 0.0)
-    sleep = data.get('sleep_hours', 0.0)
-    steps = data.get('steps', 0)
-    today = datetime.date.today().isoformat()
+    # PATCH: only the trackers sent are written; the others keep today's values
+    fields = {k: data[k] for k in TRACKER_FIELDS if data.get(k) is not None}
+    if not fields:
+        return jsonify(error=f"Send at least one of: {', '.join(TRACKER_FIELDS)}"), 400
     try:
-        with create_db_connection() as conn, conn.cursor() as cur:
-            cur.execute("""
-                UPDATE health_tracking
-                SET water_intake = %s, sleep_hours = %s, steps = %s
-                WHERE user_id = %s AND track_date = %s
-            """, (water, sleep, steps, current_user_id, today))
-            conn.commit()
+        upsert_today(current_user_id, fields)
         return jsonify(message="All trackers updated"), 200
     except Error:
         return jsonify(error="Failed to update all trackers"), 500
 
-from mysql.connector import Error  # Adjust import based on your database library
+MAX_HISTORY_POINTS = 1000
+
+@trackers_bp.route('/api/trackers/history', methods=['GET'])
+@token_required
+def get_tracker_history(current_user_id):
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD&granularity=day|week|month (default: last 30 days, daily).
+
+    Weeks start on Monday; the range is widened to whole periods.
+    """
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify(error=f"granularity must be one of: {', '.join(GRANULARITIES)}"), 400
+    try:
+        end = request.args.get('end')
+        end = datetime.date.fromisoformat(end) if end else datetime.date.today()
+        start = request.args.get('start')
+        start = datetime.date.fromisoformat(start) if start else end - datetime.timedelta(days=29)
+    except ValueError:
+        return jsonify(error="start and end must be dates (YYYY-MM-DD)"), 400
+    if start > end:
+        return jsonify(error="start must not be after end"), 400
+    if len(list(islice(period_starts(start, end, granularity), MAX_HISTORY_POINTS + 1))) > MAX_HISTORY_POINTS:
+        return jsonify(error=f"Range too long; at most {MAX_HISTORY_POINTS} {granularity}s"), 400
+    try:
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            points = tracker_history(cur, current_user_id, start, end, granularity)
+        return jsonify(granularity=granularity, start=start.isoformat(), end=end.isoformat(), points=points), 200
+    except Error:
+        return jsonify(error="Failed to fetch tracker history"), 500
 
 @trackers_bp.route('/api/trackers/sleep/last7', methods=['GET'])
 @token_required
 def get_last7_sleep(current_user_id):
     today = datetime.date.today()
-    start_date = today - datetime.timedelta(days=6)
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
-            # Log query parameters for debugging
-            print("Query params:", current_user_id, start_date.isoformat(), today.isoformat())
-            
-            # Execute the query
-            cur.execute("""
-                SELECT track_date, sleep_hours
-                FROM health_tracking
-                WHERE user_id = %s AND track_date BETWEEN %s AND %s
-                ORDER BY track_date ASC
-            """, (current_user_id, start_date.isoformat(), today.isoformat()))
-            rows = cur.fetchall()
-            
-            # Log raw database output
-            print("Raw database rows:", rows)
-            
-            # Convert track_date to ISO string for consistent lookup
-            date_map = {row['track_date'].isoformat(): float(row['sleep_hours']) for row in rows}
-            
-            # Build result for the last 7 days
-            result = []
-            for i in range(7):
-                d = (start_date + datetime.timedelta(days=i)).isoformat()
-                result.append({'date': d, 'hours': date_map.get(d, 0.0)})
-            return jsonify(result), 200
-    except Error as e:
-        print(f"Database error: {e}")
+            points = tracker_history(cur, current_user_id, today - datetime.timedelta(days=6), today, 'day')
+        return jsonify([{'date': p['start'], 'hours': p['sleep_hours']['total']} for p in points]), 200
+    except Error:
         return jsonify(error="Failed to fetch sleep data"), 500
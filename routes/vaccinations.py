@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 from utils.db import create_db_connection
 from utils.auth_utils import token_required
+from utils.current_child import get_current_child_id
+from utils.versions import bump_version, get_etag, is_fresh, not_modified, with_etag
+from utils.reminders import refresh_vaccination
+from utils.vaccine_schedule import ACTIONABLE, children_schedules
 from mysql.connector import Error
 import datetime
 
@@ -17,14 +21,9 @@ def add_vaccination(current_user_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
             # Get the current_child_id from users table
-            cur.execute("""
-                SELECT current_child_id
-                FROM users
-                WHERE id = %s
-            """, (current_user_id,))
-            user = cur.fetchone()
+            child_id = get_current_child_id(current_user_id, cur)
             
-            if not user or not user['current_child_id']:
+            if not child_id:
                 return jsonify(error='No child selected. Please select a child first.'), 400
                 
             # Insert the vaccination record
@@ -35,7 +34,7 @@ def add_vaccination(current_user_id):
                 )
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """, (
-                user['current_child_id'],
+                child_id,
                 data['name'],
                 data['date'],
                 data.get('nextDue', None),
@@ -43,8 +42,10 @@ def add_vaccination(current_user_id):
                 datetime.datetime.now(),
                 datetime.datetime.now()
             ))
-            conn.commit()
             vaccination_id = cur.lastrowid
+            bump_version(cur, 'vaccinations', child_id)
+            conn.commit()
+        refresh_vaccination(vaccination_id)
         return jsonify(message='Vaccination added successfully', vaccination_id=vaccination_id), 201
     except Error as e:
         return jsonify(error=f'Failed to add vaccination: {str(e)}'), 500
@@ -54,15 +55,14 @@ def add_vaccination(current_user_id):
 def get_vaccinations(current_user_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
-            cur.execute("""
-                SELECT current_child_id
-                FROM users
-                WHERE id = %s
-            """, (current_user_id,))
-            user = cur.fetchone()
+            child_id = get_current_child_id(current_user_id, cur)
             
-            if not user or not user['current_child_id']:
+            if not child_id:
                 return jsonify(vaccinations=[]), 200  # Return empty array instead of 404
+
+            etag = get_etag(cur, 'vaccinations', child_id)
+            if is_fresh(etag):
+                return not_modified(etag)
                 
             cur.execute("""
                 SELECT 
@@ -77,7 +77,7 @@ def get_vaccinations(current_user_id):
                 FROM child_vaccinations 
                 WHERE child_id = %s
                 ORDER BY date_received DESC
-            """, (user['current_child_id'],))
+            """, (child_id,))
             vaccinations = cur.fetchall()
             
             for vaccination in vaccinations:
@@ -90,25 +90,58 @@ def get_vaccinations(current_user_id):
                 if vaccination['updated_at']:
                     vaccination['updated_at'] = vaccination['updated_at'].isoformat()
                 
-        return jsonify(vaccinations=vaccinations), 200
+        return with_etag(jsonify(vaccinations=vaccinations), etag), 200
     except Error as e:
         return jsonify(error=f'Failed to fetch vaccinations: {str(e)}'), 500
 
+@vaccinations_bp.route('/api/vaccinations/schedule', methods=['GET'])
+@token_required
+def get_vaccination_schedule(current_user_id):
+    """Every dose of the standard schedule for the selected child, with its status."""
+    try:
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            child_id = get_current_child_id(current_user_id, cur)
+            if not child_id:
+                return jsonify(error='No child selected. Please select a child first.'), 400
+            schedules = children_schedules(cur, current_user_id, child_id)
+        if not schedules:
+            return jsonify(error='Child not found'), 404
+        return jsonify(schedules[0]), 200
+    except Error as e:
+        return jsonify(error=f'Failed to compute vaccination schedule: {str(e)}'), 500
+
+@vaccinations_bp.route('/api/vaccinations/due', methods=['GET'])
+@token_required
+def get_due_vaccinations(current_user_id):
+    """Overdue, due and upcoming doses for all of the user's children (?child=current for one)."""
+    try:
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            child_id = None
+            if request.args.get('child') == 'current':
+                child_id = get_current_child_id(current_user_id, cur)
+                if not child_id:
+                    return jsonify(children=[]), 200
+            schedules = children_schedules(cur, current_user_id, child_id, ACTIONABLE)
+        return jsonify(children=schedules), 200
+    except Error as e:
+        return jsonify(error=f'Failed to fetch due vaccinations: {str(e)}'), 500
+
 @vaccinations_bp.route('/api/vaccinations/<int:vaccination_id>', methods=['DELETE'])
 @token_required
 def delete_vaccination(current_user_id, vaccination_id):
     try:
         with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
-            cur.execute("SELECT current_child_id FROM users WHERE id = %s", (current_user_id,))
-            user = cur.fetchone()
-            if not user or not user['current_child_id']:
+            child_id = get_current_child_id(current_user_id, cur)
+            if not child_id:
                 return jsonify(error='No child selected.'), 400
             
             cur.execute("DELETE FROM child_vaccinations WHERE id = %s AND child_id = %s", 
-                       (vaccination_id, user['current_child_id']))
+                       (vaccination_id, child_id))
             if cur.rowcount == 0:
                 return jsonify(error='Vaccination not found or not authorized'), 404
+            bump_version(cur, 'vaccinations', child_id)
             conn.commit()
+        refresh_vaccination(vaccination_id)
         return jsonify(message='Vaccination deleted successfully'), 200
     except Error as e:
         return jsonify(error=f'Failed to delete vaccination: {str(e)}'), 500
\ No newline at end of file
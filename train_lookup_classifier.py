@@ -0,0 +1,103 @@
+"""
+train_lookup_classifier.py – refit the nearest-centroid classifier behind
+chat.should_lookup from logged conversations.
+
+Each user message is labelled by the assistant reply that followed it: replies
+built from web results end with EXTERNAL_SOURCES_NOTE, so those questions
+needed a lookup and the rest did not. These labels are self-generated: the
+note only appears when the classifier (or the LLM fallback) already chose a
+lookup and the web path succeeded, so retraining reinforces past decisions
+rather than correcting them. Replies from paths that say nothing about that
+decision (errors, outages, canned safety replies, calendar answers) are left
+out, so failed lookups don't become "no lookup" examples. The shipped seed
+examples are always included so both classes are represented.
+
+    python train_lookup_classifier.py              # fit and save to LOOKUP_MODEL_FILE
+    python train_lookup_classifier.py --dry-run    # report held-out accuracy only
+"""
+import argparse, random, time
+
+from utils.db import create_db_connection
+from utils.lookup_classifier import LookupClassifier, seed_examples
+from chat import get_embeddings, LOOKUP_MODEL_FILE, EXTERNAL_SOURCES_NOTE, EMBEDDING_MODEL
+
+MAX_QUESTION_CHARS = 500
+# Replies that don't reflect a lookup decision that worked out
+UNLABELLED_REPLIES = (
+    "Error processing",
+    "I’m having trouble accessing external sources",
+    "### Medication Safety",
+    "# I'm Here for You",
+    "### Today's Appointments",
+    "Could not retrieve today's appointments",
+)
+
+def logged_examples(limit: int):
+    """(texts, labels) for the most recent `limit` user messages that got a reply."""
+    with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+        cur.execute("""
+            SELECT content, next_content FROM (
+                SELECT id, sender, content,
+                       LEAD(sender) OVER w AS next_sender,
+                       LEAD(content) OVER w AS next_content
+                FROM messages
+                WINDOW w AS (PARTITION BY session_uuid ORDER BY id)
+            ) pairs
+            WHERE sender = 'user' AND next_sender = 'assistant'
+            ORDER BY id DESC
+            LIMIT %s
+        """, (limit,))
+        rows = cur.fetchall()
+    marker = EXTERNAL_SOURCES_NOTE.strip()
+    texts, labels = [], []
+    for row in rows:
+        question = (row["content"] or "").strip()
+        reply = (row["next_content"] or "").strip()
+        if question and len(question) <= MAX_QUESTION_CHARS and not reply.startswith(UNLABELLED_REPLIES):
+            texts.append(question)
+            labels.append(marker in reply)
+    return texts, labels
+
+def evaluate(classifier, texts, labels) -> dict:
+    """Accuracy on confident predictions, and how often the classifier was confident."""
+    confident = correct = 0
+    for vector, label in zip(classifier.embed_documents(texts), labels):
+        decision = classifier.predict(None, vector=vector)
+        if decision is not None:
+            confident += 1
+            correct += decision == label
+    return dict(held_out=len(texts), confident=confident,
+                accuracy=round(correct / confident, 3) if confident else None)
+
+def train(limit: int = 5000, dry_run: bool = False, min_margin: float = 0.05) -> dict:
+    started = time.perf_counter()
+    seed_texts, seed_labels = seed_examples()
+    log_texts, log_labels = logged_examples(limit)
+    embeddings = get_embeddings()
+    classifier = LookupClassifier(embeddings.embed_documents, embeddings.embed_query,
+                                  LOOKUP_MODEL_FILE, min_margin=min_margin, embedder=EMBEDDING_MODEL)
+
+    # Hold out a fifth of the logged examples to report accuracy before fitting on everything
+    pairs = list(zip(log_texts, log_labels))
+    random.Random(0).shuffle(pairs)
+    cut = len(pairs) // 5
+    held, kept = pairs[:cut], pairs[cut:]
+    classifier.fit(seed_texts + [t for t, _ in kept], seed_labels + [l for _, l in kept])
+    stats = dict(logged=len(pairs), lookup_share=round(sum(log_labels) / len(log_labels), 3) if log_labels else None)
+    if held:
+        stats.update(evaluate(classifier, [t for t, _ in held], [l for _, l in held]))
+
+    if not dry_run:
+        classifier.fit(seed_texts + log_texts, seed_labels + log_labels)
+        classifier.save(examples=len(seed_texts) + len(log_texts))
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refit the should_lookup classifier from logged messages")
+    parser.add_argument("--limit", type=int, default=5000, help="most recent user messages to use")
+    parser.add_argument("--min-margin", type=float, default=0.05,
+                        help="margin below which predictions count as unsure in the report")
+    parser.add_argument("--dry-run", action="store_true", help="report accuracy; don't save")
+    args = parser.parse_args()
+    print(train(limit=args.limit, dry_run=args.dry_run, min_margin=args.min_margin))
@@ -0,0 +1,77 @@
+import threading, time, itertools
+from collections import OrderedDict
+import numpy as np
+
+class SemanticAnswerCache:
+    """LRU + TTL cache of answers keyed by query embedding.
+
+    A lookup returns the answer of the most similar cached query when its cosine
+    similarity reaches `threshold`. Answers are only shared between lookups
+    with the same `context` (e.g. the system prompt they were generated with),
+    so per-user prompts never leak into another user's reply.
+    """
+
+    def __init__(self, embed, max_size=512, ttl=6 * 3600, threshold=0.92):
+        self.embed = embed
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()  # key -> (unit_vector, answer, expires_at, context)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._matrix = None            # stacked vectors, rebuilt lazily
+        self._keys = []
+        self._contexts = None          # np array of each row's context, same order
+        self.stats = dict(hits=0, misses=0, evictions=0)
+
+    def _vector(self, query: str):
+        vec = np.asarray(self.embed(query), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _purge_expired(self, now):
+        expired = [k for k, (_, _, exp, _) in self._entries.items() if exp <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, query: str, vector=None, context=''):
+        """Return (answer, vector); answer is None on a miss. Reuse the vector for store()."""
+        if vector is None:
+            vector = self._vector(query)
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            if self._entries:
+                if self._matrix is None:
+                    self._keys = list(self._entries)
+                    self._matrix = np.stack([self._entries[k][0] for k in self._keys])
+                    self._contexts = np.array([self._entries[k][3] for k in self._keys], dtype=object)
+                scores = np.where(self._contexts == context, self._matrix @ vector, -np.inf)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = self._keys[best]
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return self._entries[key][1], vector
+            self.stats['misses'] += 1
+        return None, vector
+
+    def store(self, query: str, answer: str, vector=None, context=''):
+        if vector is None:
+            vector = self._vector(query)
+        with self._lock:
+            self._entries[next(self._ids)] = (vector, answer, time.monotonic() + self.ttl, context)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, size=len(self._entries), max_size=self.max_size)
@@ -1,4 +1,5 @@
-import jwt, datetime
+import jwt, datetime, hashlib, os, threading, time
+from collections import OrderedDict
 from flask import current_app, request, jsonify
 from functools import wraps
 
@@ -12,19 +13,79 @@ def generate_token(user_id: int, name: str = '', email: str = ''):
     }
     return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
 
-def token_required(f):
+# ── Verified-token cache ─────────────────────────────────────────────────
+# Keyed by a digest of (secret, token) so raw tokens are never held in memory
+# and a rotated SECRET_KEY can't produce hits. Entries expire with the token.
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+
+_token_cache = OrderedDict()  # digest -> (user_id, exp_timestamp)
+_token_lock = threading.Lock()
+_token_stats = dict(hits=0, misses=0)
+
+def _token_digest(token: str, secret: str) -> bytes:
+    return hashlib.sha256(f"{secret}\0{token}".encode()).digest()
+
+def _cached_user_id(digest: bytes):
+    now = time.time()
+    with _token_lock:
+        entry = _token_cache.get(digest)
+        if entry and entry[1] > now:
+            _token_cache.move_to_end(digest)
+            _token_stats['hits'] += 1
+            return entry[0]
+        if entry:
+            del _token_cache[digest]
+        _token_stats['misses'] += 1
+        return None
+
+def _cache_user_id(digest: bytes, user_id: int, exp: float):
+    with _token_lock:
+        _token_cache[digest] = (user_id, exp)
+        _token_cache.move_to_end(digest)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+def get_token_cache_stats():
+    with _token_lock:
+        return dict(_token_stats, size=len(_token_cache), max_size=TOKEN_CACHE_SIZE)
+
+def clear_token_cache():
+    with _token_lock:
+        _token_cache.clear()
+
+def verify_token(token: str) -> int:
+    """Return the user id for a valid token; raises jwt errors / ValueError otherwise."""
+    secret = current_app.config['SECRET_KEY']
+    digest = _token_digest(token, secret)
+    user_id = _cached_user_id(digest)
+    if user_id is not None:
+        return user_id
+    data = jwt.decode(token, secret, algorithms=["HS256"])
+    user_id = int(data['sub'])
+    if 'exp' in data:
+        _cache_user_id(digest, user_id, float(data['exp']))
+    return user_id
+
+def token_required(f=None, *, error_key='error'):
+    """Pass the verified user id as the view's first argument, or answer 401.
+
+    The child selector routes predate the shared decorator and their client
+    reads the 401 text from `message`, so they use @token_required(error_key='message').
+    """
+    if f is None:
+        return lambda view: token_required(view, error_key=error_key)
+
     @wraps(f)
     def decorated(*args, **kwargs):
         auth = request.headers.get('Authorization', '')
-        token = auth.split()[1] if auth.lower().startswith('bearer ') else None
+        token = auth.split()[1] if auth.lower().startswith('bearer ') and len(auth.split()) > 1 else None
         if not token:
-            return jsonify(error='Token is missing!'), 401
+            return jsonify({error_key: 'Token is missing!'}), 401
         try:
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user_id = int(data['sub'])
+            current_user_id = verify_token(token)
         except jwt.ExpiredSignatureError:
-            return jsonify(error='Token has expired!'), 401
-        except (jwt.InvalidTokenError, ValueError) as e:
-            return jsonify(error='Invalid token!'), 401
+            return jsonify({error_key: 'Token has expired!'}), 401
+        except (jwt.InvalidTokenError, ValueError, KeyError) as e:
+            return jsonify({error_key: 'Invalid token!'}), 401
         return f(current_user_id, *args, **kwargs)
     return decorated
@@ -0,0 +1,50 @@
+from flask import g, has_app_context
+from utils.db import create_db_connection
+
+# The selected child is read from users.current_child_id once per request and
+# memoised on flask.g, so a route and the helpers it calls share one lookup.
+# Nothing is kept across requests: a switch made through any worker is seen by
+# the very next request everywhere.
+
+def _request_cache():
+    if not has_app_context():
+        return None
+    if not hasattr(g, '_current_child_ids'):
+        g._current_child_ids = {}
+    return g._current_child_ids
+
+def _query_current_child_id(cur, user_id):
+    cur.execute("SELECT current_child_id FROM users WHERE id = %s", (user_id,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    return row['current_child_id'] if isinstance(row, dict) else row[0]
+
+def get_current_child_id(user_id, cur=None):
+    """Return the user's selected child id (or None), memoised for the current request.
+
+    Pass an open cursor to run the lookup on an existing connection.
+    """
+    user_id = int(user_id)
+    local = _request_cache()
+    if local is not None and user_id in local:
+        return local[user_id]
+    if cur is not None:
+        child_id = _query_current_child_id(cur, user_id)
+    else:
+        with create_db_connection() as conn, conn.cursor() as own_cur:
+            child_id = _query_current_child_id(own_cur, user_id)
+    if local is not None:
+        local[user_id] = child_id
+    return child_id
+
+def set_current_child_id(user_id, child_id):
+    """Record a known selection for the rest of this request, e.g. right after writing it."""
+    local = _request_cache()
+    if local is not None:
+        local[int(user_id)] = child_id
+
+def invalidate_current_child(user_id):
+    local = _request_cache()
+    if local is not None:
+        local.pop(int(user_id), None)
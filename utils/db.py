@@ -1,4 +1,7 @@
+import os, time, threading
 import mysql.connector
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
 from flask import current_app
 
 def get_db_config():
@@ -10,5 +13,158 @@ def get_db_config():
         password='1234'
     )
 
+def get_pool_config():
+    return dict(
+        size=int(os.environ.get('DB_POOL_SIZE', 10)),
+        timeout=float(os.environ.get('DB_POOL_TIMEOUT', 5)),         # max wait for a free connection
+        recycle=float(os.environ.get('DB_POOL_RECYCLE', 1800)),      # reopen connections older than this
+        ping_after=float(os.environ.get('DB_POOL_PING_AFTER', 30)),  # ping connections idle longer than this
+    )
+
+# ── Connection pool ──────────────────────────────────────────────────────
+class ConnectionPool:
+    """Fixed-size pool of MySQL connections with health checks and recycling.
+
+    Connections are opened lazily, pinged when they have been idle for a while,
+    and reopened once they pass the recycle age. Checkouts block for up to
+    `timeout` seconds before raising PoolError, which route handlers already
+    treat like any other mysql.connector Error.
+    """
+
+    def __init__(self, db_config, size=10, timeout=5.0, recycle=1800.0, ping_after=30.0):
+        self.db_config = db_config
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []  # [(raw_conn, created_at, last_used)]
+        self._stats = dict(checkouts=0, wait_time=0.0, max_wait=0.0, timeouts=0,
+                           in_use=0, created=0, recycled=0, discarded=0)
+
+    def _open(self):
+        raw = mysql.connector.connect(**self.db_config)
+        with self._lock:
+            self._stats['created'] += 1
+        return raw, time.monotonic()
+
+    def _discard(self, raw, stat='discarded'):
+        with self._lock:
+            self._stats[stat] += 1
+        try:
+            raw.close()
+        except Error:
+            pass
+
+    def _take_healthy(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                raw, created_at, last_used = self._idle.pop()
+            now = time.monotonic()
+            if now - created_at > self.recycle:
+                self._discard(raw, 'recycled')
+                continue
+            if now - last_used > self.ping_after and not raw.is_connected():
+                self._discard(raw)
+                continue
+            return raw, created_at
+        return self._open()
+
+    def checkout(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PoolError(msg=f"No database connection available within {self.timeout}s")
+        waited = time.monotonic() - started
+        try:
+            raw, created_at = self._take_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['wait_time'] += waited
+            self._stats['max_wait'] = max(self._stats['max_wait'], waited)
+            self._stats['in_use'] += 1
+        return PooledConnection(self, raw, created_at)
+
+    def release(self, raw, created_at):
+        try:
+            # Never hand out a connection with an open transaction (or a stale
+            # REPEATABLE READ snapshot from an uncommitted SELECT).
+            if raw.in_transaction:
+                raw.rollback()
+        except Error:
+            self._discard(raw)
+        else:
+            with self._lock:
+                self._idle.append((raw, created_at, time.monotonic()))
+        finally:
+            with self._lock:
+                self._stats['in_use'] -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        stats['size'] = self.size
+        stats['avg_wait'] = stats['wait_time'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for raw, _, _ in idle:
+            try:
+                raw.close()
+            except Error:
+                pass
+
+class PooledConnection:
+    """Proxy around a pooled connection; close() / `with` return it to the pool."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise PoolError(msg="Connection already returned to the pool")
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(get_db_config(), **get_pool_config())
+    return _pool
+
+def get_pool_stats():
+    return get_pool().stats()
+
 def create_db_connection():
-    return mysql.connector.connect(**get_db_config())
+    return get_pool().checkout()
@@ -0,0 +1,114 @@
+import csv, os, threading
+from collections import OrderedDict
+
+import numpy as np
+
+# WHO Child Growth Standards LMS tables (monthly, birth to 24 months), parsed
+# once into NumPy arrays. Ages between table months are linearly interpolated.
+LMS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'who_lms.csv')
+MEASURES = ('weight', 'height', 'head_circumference')
+SEXES = {'Male': 'male', 'Female': 'female'}
+DAYS_PER_MONTH = 30.4375
+GROWTH_CACHE_SIZE = int(os.environ.get('GROWTH_CACHE_SIZE', 2048))
+
+_tables = None
+_tables_lock = threading.Lock()
+
+def lms_tables():
+    """(measure, sex) -> (months, L, M, S) arrays; loaded on first use."""
+    global _tables
+    if _tables is None:
+        with _tables_lock:
+            if _tables is None:
+                rows = {}
+                with open(LMS_FILE, newline='') as f:
+                    for row in csv.DictReader(line for line in f if not line.startswith('#')):
+                        rows.setdefault((row['measure'], row['sex']), []).append(
+                            (float(row['month']), float(row['L']), float(row['M']), float(row['S'])))
+                _tables = {key: tuple(np.array(col) for col in zip(*sorted(values)))
+                           for key, values in rows.items()}
+    return _tables
+
+def _erf(x):
+    # Abramowitz & Stegun 7.1.26 (|error| < 1.5e-7), vectorized
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return sign * (1.0 - poly * np.exp(-x * x))
+
+def zscores(measure, sex, age_days, values):
+    """WHO z-scores and percentiles for arrays of ages (days) and measurements.
+
+    Entries outside the table's age range or without a value come back NaN.
+    """
+    months, L_ref, M_ref, S_ref = lms_tables()[(measure, sex)]
+    age = np.asarray(age_days, dtype=float) / DAYS_PER_MONTH
+    x = np.asarray(values, dtype=float)
+    L, M, S = (np.interp(age, months, ref) for ref in (L_ref, M_ref, S_ref))
+    valid = (age >= months[0]) & (age <= months[-1]) & (x > 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        small_L = np.abs(L) < 1e-6
+        z = np.where(small_L, np.log(x / M) / S, ((x / M) ** L - 1) / np.where(small_L, 1, L * S))
+        if measure == 'weight':
+            # WHO restricted application: beyond ±3 SD, distance is measured in
+            # units of the 2-3 SD gap so the skewed tail doesn't inflate z
+            def sd(n):
+                power = M * (1 + L * S * n) ** (1 / np.where(small_L, 1, L))
+                return np.where(small_L, M * np.exp(S * n), power)
+            sd3, sd2, sd2n, sd3n = sd(3), sd(2), sd(-2), sd(-3)
+            z = np.where(z > 3, 3 + (x - sd3) / (sd3 - sd2), z)
+            z = np.where(z < -3, -3 + (x - sd3n) / (sd2n - sd3n), z)
+        z = np.where(valid, z, np.nan)
+    percentile = 50.0 * (1.0 + _erf(z / np.sqrt(2.0)))
+    return z, percentile
+
+def _number(value, digits):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+def growth_analytics(birth_date, sex, rows):
+    """z-scores and percentiles for every record (rows ordered by record_date)."""
+    ages = np.array([(row['record_date'] - birth_date).days for row in rows], dtype=float)
+    series = {}
+    for measure in MEASURES:
+        values = np.array([np.nan if row[measure] is None else float(row[measure]) for row in rows])
+        z, pct = zscores(measure, sex, ages, values) if sex and rows else (values * np.nan, values * np.nan)
+        series[measure] = (values, z, pct)
+
+    records = []
+    for i, row in enumerate(rows):
+        record = {'record_date': row['record_date'].isoformat(), 'age_days': int(ages[i])}
+        for measure, (values, z, pct) in series.items():
+            record[measure] = None if np.isnan(values[i]) else {
+                'value': float(values[i]), 'z_score': _number(z[i], 2), 'percentile': _number(pct[i], 1)}
+        records.append(record)
+    latest = {measure: next((r[measure] for r in reversed(records) if r[measure]), None)
+              for measure in MEASURES}
+    return {
+        'sex': sex,
+        'reference': 'WHO Child Growth Standards, 0-24 months' if sex else None,
+        'records': records,
+        'latest': latest,
+    }
+
+# ── Per-child result cache ───────────────────────────────────────────────
+# child_id -> (stamp, result). The stamp carries the child's baby_growth data
+# version, so any write to their records makes the entry miss.
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+def cached_analytics(child_id, stamp):
+    with _results_lock:
+        entry = _results.get(child_id)
+        if entry and entry[0] == stamp:
+            _results.move_to_end(child_id)
+            return entry[1]
+        return None
+
+def cache_analytics(child_id, stamp, result):
+    with _results_lock:
+        _results[child_id] = (stamp, result)
+        _results.move_to_end(child_id)
+        while len(_results) > GROWTH_CACHE_SIZE:
+            _results.popitem(last=False)
@@ -0,0 +1,114 @@
+import math, os, re, threading, time
+from collections import Counter
+
+# Hybrid retrieval over the chroma_db corpus: an in-memory BM25 inverted index
+# next to the vector search, fused with reciprocal rank fusion. Each list is
+# first cut by its own absolute strength (vector relevance, share of the
+# query's idf-weighted terms a chunk contains) because RRF alone only sees
+# ranks; if nothing survives, the caller can skip the LLM altogether.
+RRF_K = 60
+CANDIDATES = int(os.environ.get('RETRIEVE_CANDIDATES', 20))
+MIN_RELEVANCE = float(os.environ.get('RETRIEVE_MIN_RELEVANCE', 0.35))
+MIN_COVERAGE = float(os.environ.get('RETRIEVE_MIN_COVERAGE', 0.5))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+class BM25Index:
+    def __init__(self, ids, texts, metadatas, stopwords=(), k1=1.5, b=0.75):
+        self.ids, self.texts, self.metadatas = ids, texts, metadatas
+        self.stopwords = frozenset(stopwords)
+        self.k1, self.b = k1, b
+        self.postings = {}  # term -> [(doc_index, term_frequency), ...]
+        self.lengths = []
+        for i, text in enumerate(texts):
+            counts = Counter(self.tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+        n = len(texts)
+        self.avg_length = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for term, p in self.postings.items()}
+        self.max_idf = math.log(1 + (n + 0.5) / 0.5) if n else 0.0
+
+    def tokenize(self, text):
+        return [t for t in _TOKEN.findall((text or '').lower()) if len(t) > 1 and t not in self.stopwords]
+
+    def search(self, query, k):
+        """[(doc_index, bm25_score, coverage), ...] best first.
+
+        coverage is the idf-weighted share of the query's terms found in the
+        document; terms the corpus has never seen count at full idf.
+        """
+        terms = set(self.tokenize(query))
+        if not terms or not self.texts:
+            return []
+        total_idf = sum(self.idf.get(t, self.max_idf) for t in terms)
+        scores, matched = {}, {}
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length))
+                scores[i] = scores.get(i, 0.0) + idf * norm
+                matched[i] = matched.get(i, 0.0) + idf
+        best = sorted(scores, key=scores.get, reverse=True)[:k]
+        return [(i, scores[i], matched[i] / total_idf) for i in best]
+
+class HybridRetriever:
+    """Retrieves from a LangChain vector store plus a BM25 index of the same chunks.
+
+    The index is rebuilt when `state_path` (written by ingest_content.py)
+    changes, so a re-ingest is picked up on the next query.
+    """
+
+    def __init__(self, get_store, state_path, stopwords=()):
+        self.get_store = get_store
+        self.state_path = state_path
+        self.stopwords = stopwords
+        self._index = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self.stats = dict(documents=0, build_seconds=0.0, hits=0, misses=0)
+
+    def _current_signature(self):
+        try:
+            return os.path.getmtime(self.state_path)
+        except OSError:
+            return None
+
+    def index(self):
+        signature = self._current_signature()
+        if self._index is None or signature != self._signature:
+            with self._lock:
+                if self._index is None or signature != self._signature:
+                    started = time.perf_counter()
+                    found = self.get_store().get(include=["documents", "metadatas"])
+                    self._index = BM25Index(found.get("ids") or [], found.get("documents") or [],
+                                            found.get("metadatas") or [], self.stopwords)
+                    self._signature = signature
+                    self.stats.update(documents=len(self._index.texts),
+                                      build_seconds=round(time.perf_counter() - started, 3))
+        return self._index
+
+    def retrieve(self, query, k=3):
+        """Up to k Documents ranked by RRF; [] when no candidate clears its cutoff."""
+        from langchain.schema import Document
+        index = self.index()
+        fused, docs = {}, {}
+
+        vector_hits = self.get_store().similarity_search_with_relevance_scores(query, k=CANDIDATES)
+        strong = [doc for doc, relevance in vector_hits if relevance >= MIN_RELEVANCE]
+        for rank, doc in enumerate(strong):
+            key = doc.page_content
+            fused[key] = fused.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            docs.setdefault(key, doc)
+
+        lexical = [i for i, _, coverage in index.search(query, CANDIDATES) if coverage >= MIN_COVERAGE]
+        for rank, i in enumerate(lexical):
+            key = index.texts[i]
+            fused[key] = fused.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            docs.setdefault(key, Document(page_content=index.texts[i], metadata=index.metadatas[i] or {}))
+
+        self.stats['hits' if fused else 'misses'] += 1
+        return [docs[key] for key in sorted(fused, key=fused.get, reverse=True)[:k]]
@@ -0,0 +1,99 @@
+import json, logging, os, threading, time
+import numpy as np
+
+logger = logging.getLogger('lookup_classifier')
+
+# Nearest-centroid intent classifier for chat.should_lookup: the mean unit
+# embedding of "needs a lookup" and "doesn't" example queries. A query goes to
+# the closer centroid when the cosine margin reaches min_margin; otherwise the
+# caller falls back to the LLM. Fitted centroids are saved to model_path by
+# train_lookup_classifier.py together with the embedder name and dimension;
+# without that file, or when it was fitted with a different embedder, the
+# seed examples are used.
+EXAMPLES_FILE = os.path.join(os.path.dirname(__file__), 'data', 'lookup_examples.json')
+
+def seed_examples():
+    """(texts, labels) from the shipped examples; label True means 'look it up'."""
+    with open(EXAMPLES_FILE) as f:
+        spec = json.load(f)
+    texts = spec['lookup'] + spec['no_lookup']
+    return texts, [True] * len(spec['lookup']) + [False] * len(spec['no_lookup'])
+
+def _unit(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+class LookupClassifier:
+    def __init__(self, embed_documents, embed_query, model_path, min_margin=0.05, embedder=''):
+        self.embed_documents = embed_documents
+        self.embed_query = embed_query
+        self.model_path = model_path
+        self.embedder = embedder
+        self.min_margin = min_margin
+        self._centroids = None  # 2 x dim: row 0 = lookup, row 1 = no lookup
+        self._lock = threading.Lock()
+        self.stats = dict(local=0, uncertain=0)
+
+    def fit(self, texts, labels):
+        vectors = _unit(self.embed_documents(list(texts)))
+        labels = np.asarray(labels, dtype=bool)
+        if labels.all() or not labels.any():
+            raise ValueError("Need examples of both classes")
+        self._centroids = _unit(np.stack([vectors[labels].mean(axis=0), vectors[~labels].mean(axis=0)]))
+        return self
+
+    def save(self, **meta):
+        os.makedirs(os.path.dirname(self.model_path) or '.', exist_ok=True)
+        tmp = self.model_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(dict(meta, trained_at=time.time(), embedder=self.embedder,
+                           dim=int(self._centroids.shape[1]), lookup=self._centroids[0].tolist(),
+                           no_lookup=self._centroids[1].tolist()), f)
+        os.replace(tmp, self.model_path)
+
+    def centroids(self):
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    self._centroids = self._load_model()
+                    if self._centroids is None:
+                        self.fit(*seed_examples())
+        return self._centroids
+
+    def _load_model(self):
+        """Saved centroids, or None when missing or fitted with another embedder."""
+        try:
+            with open(self.model_path) as f:
+                model = json.load(f)
+            centroids = _unit([model['lookup'], model['no_lookup']])
+        except (OSError, ValueError, KeyError):
+            return None
+        if model.get('embedder') != self.embedder or model.get('dim') != centroids.shape[1]:
+            logger.warning("Ignoring %s: fitted with %s (dim %s), not %s; using seed examples",
+                           self.model_path, model.get('embedder'), model.get('dim'), self.embedder)
+            return None
+        return centroids
+
+    def score(self, query, vector=None):
+        """Cosine margin: > 0 leans 'lookup', < 0 leans 'no lookup'."""
+        if vector is None:
+            vector = self.embed_query(query)
+        vector = _unit(vector)
+        centroids = self.centroids()
+        if centroids.shape[1] != vector.shape[-1]:
+            # Embedder changed under a saved model that claimed to match; refit from the seeds
+            with self._lock:
+                self.fit(*seed_examples())
+            centroids = self._centroids
+        similarities = centroids @ vector
+        return float(similarities[0] - similarities[1])
+
+    def predict(self, query, vector=None):
+        """True / False when confident, None when the LLM should decide."""
+        margin = self.score(query, vector)
+        if abs(margin) < self.min_margin:
+            self.stats['uncertain'] += 1
+            return None
+        self.stats['local'] += 1
+        return margin > 0
@@ -0,0 +1,137 @@
+import hashlib, html, json, os, re, threading, time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:  # C parser when installed; the regex path below handles the common case otherwise
+    import lxml.html as _lxml_html
+except ImportError:
+    _lxml_html = None
+
+# Web pages for chat answers: one pooled Session, and an on-disk cache of the
+# extracted paragraphs keyed by URL. Fresh entries (FETCH_CACHE_TTL) are used
+# as-is; stale ones are revalidated with If-None-Match / If-Modified-Since and
+# served stale if the site is unreachable. Only the paragraph text is cached,
+# so popular pages are downloaded and parsed once per TTL.
+FETCH_CACHE_DIR = os.environ.get('FETCH_CACHE_DIR', 'web_cache')
+FETCH_CACHE_TTL = float(os.environ.get('FETCH_CACHE_TTL', 6 * 3600))
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+STORED_PARAGRAPHS = 20
+USER_AGENT = 'BabyGuardBot/1.0 (+health content summarizer)'
+
+_SKIP_BLOCKS = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>|<!--.*?-->', re.I | re.S)
+_PARAGRAPH = re.compile(r'<p\b[^>]*>(.*?)(?=</p\s*>|<p\b|</(?:div|section|article|body)\b)', re.I | re.S)
+_TAG = re.compile(r'<[^>]+>')
+_SPACE = re.compile(r'\s+')
+
+def extract_paragraphs(page, limit=STORED_PARAGRAPHS):
+    """Text of the first `limit` non-empty <p> elements."""
+    if _lxml_html is not None:
+        try:
+            root = _lxml_html.fromstring(page)
+            paras = (_SPACE.sub(' ', p.text_content()).strip() for p in root.iter('p'))
+            return [p for p in paras if p][:limit]
+        except (ValueError, _lxml_html.etree.ParserError):
+            pass
+    paras = []
+    for match in _PARAGRAPH.finditer(_SKIP_BLOCKS.sub(' ', page)):
+        text = _SPACE.sub(' ', html.unescape(_TAG.sub(' ', match.group(1)))).strip()
+        if text:
+            paras.append(text)
+            if len(paras) >= limit:
+                break
+    return paras
+
+class PageFetcher:
+    def __init__(self, cache_dir=FETCH_CACHE_DIR, ttl=FETCH_CACHE_TTL, pool_size=8):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._locks = [threading.Lock() for _ in range(64)]  # striped per URL
+        self.stats = dict(fresh=0, revalidated=0, fetched=0, stale=0)
+        self._last_prune = time.time()
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+    def _load(self, url):
+        try:
+            with open(self._path(url)) as f:
+                entry = json.load(f)
+            return entry if entry.get('url') == url else None
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(entry['url'])
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+        if time.time() - self._last_prune > 3600:
+            self._last_prune = time.time()
+            self.prune()
+
+    def prune(self, max_age=None):
+        """Delete entries untouched for max_age (default 4 * TTL); stale-but-recent ones stay for revalidation."""
+        cutoff = time.time() - (max_age or 4 * self.ttl)
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for item in entries:
+                    if item.name.endswith('.json') and item.stat().st_mtime < cutoff:
+                        os.remove(item.path)
+        except OSError:
+            pass
+
+    def _download(self, url, timeout, entry):
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        with self.session.get(url, timeout=timeout, headers=headers, stream=True) as resp:
+            if resp.status_code == 304 and entry:
+                self.stats['revalidated'] += 1
+                return dict(entry, fetched_at=time.time())
+            resp.raise_for_status()
+            body = bytearray()
+            for block in resp.iter_content(64 * 1024):
+                body += block
+                if len(body) >= MAX_PAGE_BYTES:
+                    break
+            # requests assumes ISO-8859-1 for text/* without a charset; most pages are UTF-8
+            charset = resp.encoding if 'charset' in resp.headers.get('Content-Type', '').lower() else 'utf-8'
+            self.stats['fetched'] += 1
+            return dict(url=url, paragraphs=extract_paragraphs(bytes(body).decode(charset or 'utf-8', errors='replace')),
+                        etag=resp.headers.get('ETag'), last_modified=resp.headers.get('Last-Modified'),
+                        fetched_at=time.time())
+
+    def paragraphs(self, url, timeout=5):
+        """Extracted paragraphs for `url`, from cache when possible."""
+        entry = self._load(url)
+        if entry and time.time() - entry['fetched_at'] < self.ttl:
+            self.stats['fresh'] += 1
+            return entry['paragraphs']
+        # One download per URL at a time; the others wait and read the result
+        with self._locks[hash(url) % len(self._locks)]:
+            latest = self._load(url)
+            if latest and time.time() - latest['fetched_at'] < self.ttl:
+                self.stats['fresh'] += 1
+                return latest['paragraphs']
+            try:
+                entry = self._download(url, timeout, latest)
+            except requests.RequestException:
+                if latest:
+                    self.stats['stale'] += 1
+                    return latest['paragraphs']
+                raise
+            self._save(entry)
+            return entry['paragraphs']
+
+    def text(self, url, max_paragraphs=5, max_length=500, timeout=5):
+        return " ".join(self.paragraphs(url, timeout)[:max_paragraphs])[:max_length]
@@ -0,0 +1,55 @@
+import calendar, datetime
+
+# Series repeat every `interval` days / weeks / months / years from their
+# first event_date. Monthly and yearly series anchored on a day a month lacks
+# (the 31st, Feb 29) fall on that month's last day.
+FREQUENCIES = ('daily', 'weekly', 'monthly', 'yearly')
+_STEP_DAYS = {'daily': 1, 'weekly': 7}
+_STEP_MONTHS = {'monthly': 1, 'yearly': 12}
+
+def add_months(day, months):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return datetime.date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+def occurrences(first, freq, interval, window_start, window_end, until=None):
+    """Dates of a series that fall in [window_start, window_end].
+
+    Jumps straight to the first occurrence inside the window, so the cost is
+    proportional to the occurrences returned, not to the age of the series.
+    """
+    interval = max(int(interval or 1), 1)
+    last = min(window_end, until) if until else window_end
+    if last < first:
+        return []
+    if freq in _STEP_DAYS:
+        step = _STEP_DAYS[freq] * interval
+        n = max(0, -(-(window_start - first).days // step))  # ceil division
+        day = first + datetime.timedelta(days=n * step)
+        dates = []
+        while day <= last:
+            dates.append(day)
+            day += datetime.timedelta(days=step)
+        return dates
+    if freq in _STEP_MONTHS:
+        step = _STEP_MONTHS[freq] * interval
+        months_in = (window_start.year - first.year) * 12 + window_start.month - first.month
+        n = max(0, months_in // step)
+        dates = []
+        while True:
+            day = add_months(first, n * step)
+            if day > last:
+                return dates
+            if day >= window_start:
+                dates.append(day)
+            n += 1
+    raise ValueError(f"Unknown recurrence frequency: {freq}")
+
+def max_gap(freq, interval):
+    """Longest stretch between two consecutive dates of a series."""
+    interval = max(int(interval or 1), 1)
+    if freq in _STEP_DAYS:
+        return datetime.timedelta(days=_STEP_DAYS[freq] * interval)
+    if freq in _STEP_MONTHS:
+        return datetime.timedelta(days=31 * _STEP_MONTHS[freq] * interval)
+    raise ValueError(f"Unknown recurrence frequency: {freq}")
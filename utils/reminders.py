@@ -0,0 +1,290 @@
+import datetime, heapq, json, logging, os, threading, time
+from utils.db import create_db_connection
+from utils.recurrence import occurrences, max_gap
+
+# In-process reminder scheduler. Reminders due within HORIZON are bulk-loaded
+# with indexed range queries into a min-heap; a single thread sleeps until the
+# earliest one and hands it to the sink. Writes in the scheduler's process
+# call refresh_* and show up at once. Every RECONCILE_INTERVAL (and at start)
+# the window is re-read and the heap reconciled against it as a safety net,
+# which also picks up writes from other workers, where refresh_* is a no-op.
+# Just before firing, the row is re-read so a reminder for a row deleted or
+# rescheduled since loading is dropped.
+#   calendar_events: fires reminder_offset minutes (at most MAX_OFFSET) before
+#                    event_date + event_time; recurring series are found by
+#                    their next_reminder_at, which reconciling moves forward
+#   child_vaccinations: fires at VACCINE_REMINDER_HOUR on next_due_date
+HORIZON = datetime.timedelta(hours=float(os.environ.get('REMINDER_HORIZON_HOURS', 48)))
+RECONCILE_INTERVAL = datetime.timedelta(seconds=float(os.environ.get('REMINDER_RECONCILE_SECONDS', 3600)))
+VACCINE_REMINDER_HOUR = int(os.environ.get('VACCINE_REMINDER_HOUR', 9))
+MAX_OFFSET = datetime.timedelta(days=30)
+
+logger = logging.getLogger('reminders')
+
+# ── Sinks ────────────────────────────────────────────────────────────────
+class LogSink:
+    def send(self, reminder):
+        logger.info("Reminder for user %s: %s at %s", reminder['user_id'], reminder['title'], reminder['due_at'])
+
+class FileSink:
+    """Appends one JSON object per reminder; handy for tests and local runs."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, reminder):
+        with self._lock, open(self.path, 'a') as f:
+            f.write(json.dumps(reminder, default=str) + '\n')
+
+def sink_from_env():
+    """REMINDER_SINK=log (default) or file:<path>."""
+    spec = os.environ.get('REMINDER_SINK', 'log')
+    if spec.startswith('file:'):
+        return FileSink(spec[5:])
+    return LogSink()
+
+# ── Loading ──────────────────────────────────────────────────────────────
+def _event_reminders(row, start, end):
+    offset = min(datetime.timedelta(minutes=max(row['reminder_offset'] or 0, 0)), MAX_OFFSET)
+    at = row['event_time'] or datetime.timedelta()
+    # An occurrence's reminder lands in [start, end] only if the occurrence is within offset of it
+    first_day = (start + offset).date() - datetime.timedelta(days=1)
+    last_day = (end + offset).date()
+    if row['is_recurring']:
+        days = occurrences(row['event_date'], row['recurrence_freq'] or 'weekly', row['recurrence_interval'],
+                           first_day, last_day, row['recurrence_until'])
+    else:
+        days = [row['event_date']]
+    for day in days:
+        due_at = datetime.datetime.combine(day, datetime.time()) + at
+        fire_at = due_at - offset
+        if start <= fire_at <= end:
+            yield (('event', row['id']), ('event', row['id'], day.isoformat()), fire_at, {
+                'kind': 'calendar_event', 'event_id': row['id'], 'user_id': row['user_id'],
+                'title': row['title'], 'event_type': row['event_type'], 'due_at': due_at.isoformat()})
+
+def _vaccination_reminder(row, start, end):
+    fire_at = datetime.datetime.combine(row['next_due_date'], datetime.time(VACCINE_REMINDER_HOUR))
+    if start <= fire_at <= end:
+        yield (('vaccination', row['id']), ('vaccination', row['id'], row['next_due_date'].isoformat()), fire_at, {
+            'kind': 'vaccination', 'vaccination_id': row['id'], 'child_id': row['child_id'],
+            'user_id': row['user_id'], 'title': f"{row['vaccination_name']} due for {row['child_name']}",
+            'due_at': row['next_due_date'].isoformat()})
+
+_EVENT_COLUMNS = """id, user_id, event_type, event_date, event_time, title, reminder_offset,
+                    is_recurring, recurrence_freq, recurrence_interval, recurrence_until"""
+_VACCINATION_SQL = """
+    SELECT v.id, v.child_id, v.vaccination_name, v.next_due_date, c.user_id, c.full_name AS child_name
+    FROM child_vaccinations v
+    JOIN children c ON c.id = v.child_id
+"""
+
+def _next_fire(row, after):
+    """A recurring event's first reminder at or after `after`; None once the series has ended."""
+    # Reminders are as far apart as the occurrences, so one gap always holds the next
+    span = max_gap(row['recurrence_freq'] or 'weekly', row['recurrence_interval'])
+    return min((fire_at for _, _, fire_at, _ in _event_reminders(row, after, after + span)), default=None)
+
+def seed_next_reminder(cur, event_id):
+    """Set a new series' next_reminder_at to its first reminder; reconciling moves it on."""
+    cur.execute("""
+        UPDATE calendar_events
+        SET next_reminder_at = TIMESTAMP(event_date, COALESCE(event_time, '00:00:00'))
+                               - INTERVAL LEAST(GREATEST(reminder_offset, 0), %s) MINUTE
+        WHERE id = %s AND is_recurring = 1
+    """, (int(MAX_OFFSET.total_seconds() // 60), event_id))
+
+def advance_series(cur, start):
+    """Move next_reminder_at of series whose reminder passed before `start` to their next one."""
+    cur.execute(f"""
+        SELECT {_EVENT_COLUMNS} FROM calendar_events
+        WHERE is_recurring = 1 AND next_reminder_at < %s
+    """, (start,))
+    for row in cur.fetchall():
+        cur.execute("UPDATE calendar_events SET next_reminder_at = %s WHERE id = %s",
+                    (_next_fire(row, start) if row['reminder_offset'] is not None else None, row['id']))
+
+def load_window(cur, start, end, event_id=None, vaccination_id=None):
+    """Reminders firing in [start, end]; optionally just one event or vaccination."""
+    reminders = []
+    if vaccination_id is None:
+        where, params = ("id = %s", (event_id,)) if event_id else (
+            "(is_recurring = 0 OR is_recurring IS NULL) AND event_date BETWEEN %s AND %s",
+            (start.date(), (end + MAX_OFFSET).date()))
+        cur.execute(f"SELECT {_EVENT_COLUMNS} FROM calendar_events WHERE {where} AND reminder_offset IS NOT NULL",
+                    params)
+        rows = cur.fetchall()
+        if not event_id:
+            # Only series whose next reminder falls before the window's end
+            cur.execute(f"""
+                SELECT {_EVENT_COLUMNS} FROM calendar_events
+                WHERE is_recurring = 1 AND next_reminder_at <= %s AND reminder_offset IS NOT NULL
+            """, (end,))
+            rows += cur.fetchall()
+        for row in rows:
+            reminders.extend(_event_reminders(row, start, end))
+    if event_id is None:
+        if vaccination_id:
+            cur.execute(_VACCINATION_SQL + " WHERE v.id = %s AND v.next_due_date IS NOT NULL", (vaccination_id,))
+        else:
+            cur.execute(_VACCINATION_SQL + " WHERE v.next_due_date BETWEEN %s AND %s", (start.date(), end.date()))
+        for row in cur.fetchall():
+            reminders.extend(_vaccination_reminder(row, start, end))
+    return reminders
+
+# ── Scheduler ────────────────────────────────────────────────────────────
+class ReminderScheduler:
+    def __init__(self, sink, horizon=HORIZON, reconcile_interval=RECONCILE_INTERVAL):
+        self.sink = sink
+        self.horizon = horizon
+        self.reconcile_interval = reconcile_interval
+        self._heap = []          # (fire_at, seq, key)
+        self._entries = {}       # key -> (fire_at, payload); heap items not matching are stale
+        self._by_source = {}     # ('event' | 'vaccination', id) -> {keys}
+        self._fired = {}         # key -> fire_at, so a reload doesn't repeat a reminder
+        self._seq = 0
+        self._window_end = None
+        self._loaded_at = None   # start of the next reload, so reminders due between polls still fire
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        self._reload_window(datetime.datetime.now())
+        self._thread = threading.Thread(target=self._loop, name='reminders', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return dict(pending=len(self._entries), fired=len(self._fired),
+                        window_end=self._window_end.isoformat() if self._window_end else None)
+
+    def _add(self, source, key, fire_at, payload):
+        if self._fired.get(key) == fire_at:
+            return
+        self._entries[key] = (fire_at, payload)
+        self._by_source.setdefault(source, set()).add(key)
+        self._seq += 1
+        heapq.heappush(self._heap, (fire_at, self._seq, key))
+
+    def _drop_source(self, source):
+        for key in self._by_source.pop(source, ()):
+            self._entries.pop(key, None)
+
+    def _reload_window(self, now):
+        """Reconcile the heap with the database for [last reload, now + horizon]."""
+        start = max(min(self._loaded_at or now, now), now - self.horizon)
+        end = now + self.horizon
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            advance_series(cur, start)
+            conn.commit()
+            reminders = load_window(cur, start, end)
+        current = {key: (source, fire_at, payload) for source, key, fire_at, payload in reminders}
+        with self._cond:
+            # Rows deleted or moved since they were loaded; stale heap items are skipped
+            for key in [k for k, (fire_at, _) in self._entries.items()
+                        if k not in current or current[k][1] != fire_at]:
+                del self._entries[key]
+            for key, (source, fire_at, payload) in current.items():
+                if key in self._entries:
+                    self._entries[key] = (fire_at, payload)  # pick up edited titles etc.
+                else:
+                    self._add(source, key, fire_at, payload)
+            self._window_end = end
+            self._loaded_at = now
+            cutoff = now - self.horizon
+            self._fired = {k: t for k, t in self._fired.items() if t >= cutoff}
+            self._by_source = {source: live for source, keys in self._by_source.items()
+                               if (live := keys & self._entries.keys())}
+            self._cond.notify()
+
+    def refresh(self, source):
+        """Re-read one event or vaccination after a write (or drop it after a delete)."""
+        now = datetime.datetime.now()
+        with self._cond:
+            end = self._window_end or now + self.horizon
+        kind, source_id = source
+        with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+            reminders = load_window(cur, now, end, **{f'{kind}_id': source_id})
+        with self._cond:
+            self._drop_source(source)
+            for _, key, fire_at, payload in reminders:
+                self._add(source, key, fire_at, payload)
+            self._cond.notify()
+
+    def _still_due(self, key, fire_at):
+        """Re-read the row behind a reminder; False if it was deleted or rescheduled since loading."""
+        kind, source_id = key[0], key[1]
+        try:
+            with create_db_connection() as conn, conn.cursor(dictionary=True) as cur:
+                current = load_window(cur, fire_at, fire_at, **{f'{kind}_id': source_id})
+        except Exception as e:
+            logger.warning("Reminder check failed for %s, sending anyway: %s", key, e)
+            return True
+        return any(k == key for _, k, _, _ in current)
+
+    def _loop(self):
+        while True:
+            due = []
+            with self._cond:
+                if self._stopped:
+                    return
+                now = datetime.datetime.now()
+                while self._heap and self._heap[0][0] <= now:
+                    fire_at, _, key = heapq.heappop(self._heap)
+                    entry = self._entries.get(key)
+                    if entry and entry[0] == fire_at:
+                        del self._entries[key]
+                        self._fired[key] = fire_at
+                        due.append((key, fire_at, entry[1]))
+                next_reload = self._loaded_at + self.reconcile_interval
+                if not due and now < next_reload:
+                    wake = min(self._heap[0][0], next_reload) if self._heap else next_reload
+                    self._cond.wait(timeout=max((wake - now).total_seconds(), 0.05))
+                    continue
+            for key, fire_at, payload in due:
+                if not self._still_due(key, fire_at):
+                    continue
+                try:
+                    self.sink.send(payload)
+                except Exception as e:
+                    logger.warning("Reminder sink failed: %s", e)
+            if not due:
+                try:
+                    self._reload_window(now)
+                except Exception as e:
+                    logger.warning("Reminder reload failed: %s", e)
+                    time.sleep(30)
+
+_scheduler = None
+
+def start_scheduler(sink=None):
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ReminderScheduler(sink or sink_from_env()).start()
+    return _scheduler
+
+def get_scheduler():
+    return _scheduler
+
+def refresh_event(event_id):
+    _refresh(('event', int(event_id)))
+
+def refresh_vaccination(vaccination_id):
+    _refresh(('vaccination', int(vaccination_id)))
+
+def _refresh(source):
+    """No-op unless this process runs the scheduler; never fails the caller's request."""
+    if _scheduler is None:
+        return
+    try:
+        _scheduler.refresh(source)
+    except Exception as e:
+        logger.warning("Reminder refresh failed for %s: %s", source, e)
@@ -0,0 +1,61 @@
+import threading, time
+from collections import OrderedDict
+
+# ── Store ────────────────────────────────────────────────────────────────
+class SessionMemoryStore:
+    """Bounded map of session_uuid -> conversation memory.
+
+    Sessions are evicted least-recently-used beyond `max_sessions` and after
+    `idle_ttl` seconds without use; each keeps at most `max_messages` messages.
+    An evicted session starts again with empty memory.
+    """
+
+    def __init__(self, memory_factory, max_sessions=1000, idle_ttl=3600.0, max_messages=40):
+        self.memory_factory = memory_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self._sessions = OrderedDict()  # session_uuid -> (memory, last_used)
+        self._lock = threading.Lock()
+        self.stats = dict(hits=0, misses=0, evictions=0)
+
+    def _evict(self, now):
+        while self._sessions:
+            uuid, (_, last_used) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_used <= self.idle_ttl:
+                break
+            del self._sessions[uuid]
+            self.stats['evictions'] += 1
+
+    def get(self, session_uuid: str):
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(session_uuid)
+            if entry:
+                self._sessions[session_uuid] = (entry[0], now)
+                self._sessions.move_to_end(session_uuid)
+                self.stats['hits'] += 1
+                return entry[0]
+            memory = self.memory_factory()
+            self._sessions[session_uuid] = (memory, now)
+            self.stats['misses'] += 1
+            self._evict(now)
+        return memory
+
+    def record(self, session_uuid: str, user_msg: str, ai_msg: str):
+        memory = self.get(session_uuid)
+        memory.chat_memory.add_user_message(user_msg)
+        memory.chat_memory.add_ai_message(ai_msg)
+        messages = memory.chat_memory.messages
+        if len(messages) > self.max_messages:
+            del messages[:len(messages) - self.max_messages]
+        return memory
+
+    def drop(self, session_uuid: str):
+        with self._lock:
+            self._sessions.pop(session_uuid, None)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, sessions=len(self._sessions), max_sessions=self.max_sessions)
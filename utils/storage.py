@@ -0,0 +1,85 @@
+import os, re, shutil, uuid
+from urllib.parse import quote
+
+# Media files are content-addressed: <sha[:2]>/<sha[2:4]>/<sha><ext>. Two levels
+# of 256-way sharding keep every directory small however many files we hold.
+# user_media.image_url stores MEDIA_URL_PREFIX + key.
+MEDIA_URL_PREFIX = 'uploads/'
+_CONTENT_NAME = re.compile(r'^([0-9a-f]{64})(\.[A-Za-z0-9]{1,8})?$')
+
+def content_key(content_hash, filename=''):
+    ext = os.path.splitext(filename)[1].lower()
+    return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{ext}"
+
+def media_url(key):
+    return MEDIA_URL_PREFIX + key
+
+def key_from_name(name):
+    """Storage key for an image_url, a /uploads/<path> URL or a bare file name.
+
+    Content-addressed names map to their shard; anything else is a legacy
+    file stored flat in the upload folder.
+    """
+    name = name.replace('\\', '/').lstrip('/')
+    basename = name.rsplit('/', 1)[-1]
+    match = _CONTENT_NAME.match(basename)
+    if match:
+        return content_key(match.group(1), basename)
+    return basename
+
+class LocalDiskStorage:
+    """Keys are relative paths under `root`."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def local_path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def exists(self, key):
+        return os.path.exists(self.local_path(key))
+
+    def put_file(self, key, src_path, move=True):
+        target = self.local_path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"  # unique per writer, even threads of one process
+        (shutil.move if move else shutil.copyfile)(src_path, tmp)
+        os.replace(tmp, target)
+
+    def open(self, key):
+        return open(self.local_path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+class LocalObjectStore(LocalDiskStorage):
+    """Stand-in for an S3-style bucket: one flat namespace of opaque keys.
+
+    Objects are single files in `root` named by the URL-quoted key, so code
+    written against it can't rely on directories existing.
+    """
+
+    def local_path(self, key):
+        if not key or key.startswith('/') or '..' in key.split('/'):
+            raise ValueError(f"Invalid storage key: {key}")
+        return os.path.join(self.root, quote(key, safe=''))
+
+_storage = None
+
+def get_storage():
+    """Backend picked by STORAGE_BACKEND (disk | object); built once per process."""
+    global _storage
+    if _storage is None:
+        if os.environ.get('STORAGE_BACKEND', 'disk') == 'object':
+            root = os.environ.get('OBJECT_STORE_ROOT', 'object_store')
+            os.makedirs(root, exist_ok=True)
+            _storage = LocalObjectStore(root)
+        else:
+            _storage = LocalDiskStorage(os.environ.get('UPLOAD_FOLDER', 'uploads'))
+    return _storage
@@ -0,0 +1,75 @@
+import logging, os, tempfile, threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.storage import get_storage
+
+# Derived sizes: name -> longest edge in pixels
+IMAGE_SIZES = {'thumb': 256, 'medium': 1024}
+DERIVED_DIR = '_sizes'
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('THUMBNAIL_WORKERS', 2)),
+                               thread_name_prefix='thumbnail')
+_pending = set()
+_pending_lock = threading.Lock()
+
+def derived_key(key, size):
+    """ab/cd/<sha>.jpg -> _sizes/thumb/ab/cd/<sha>.jpg"""
+    return f"{DERIVED_DIR}/{size}/{key}"
+
+def _render(key, size):
+    from PIL import Image, ImageOps  # optional dependency; only the workers need it
+    storage = get_storage()
+    fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+    os.close(fd)
+    try:
+        with storage.open(key) as fh, Image.open(fh) as img:
+            fmt = img.format or 'PNG'
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((IMAGE_SIZES[size], IMAGE_SIZES[size]))
+            if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            img.save(tmp, format=fmt, optimize=True)
+        storage.put_file(derived_key(key, size), tmp)  # readers never see a half-written file
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _run(key, size):
+    try:
+        _render(key, size)
+    except Exception as e:
+        logger.warning("Thumbnail error for %s (%s): %s", key, size, e)
+    finally:
+        with _pending_lock:
+            _pending.discard((key, size))
+
+def schedule_derivatives(key, sizes=None):
+    """Queue any missing derived sizes for background generation."""
+    storage = get_storage()
+    for size in sizes or IMAGE_SIZES:
+        if storage.exists(derived_key(key, size)):
+            continue
+        with _pending_lock:
+            if (key, size) in _pending:
+                continue
+            _pending.add((key, size))
+        _executor.submit(_run, key, size)
+
+def resolve_size(key, size):
+    """Storage key to serve for `size`: the derivative if ready, else the original
+    (queueing the derivative so a later request gets it)."""
+    if size not in IMAGE_SIZES:
+        return key
+    storage = get_storage()
+    target = derived_key(key, size)
+    if storage.exists(target):
+        return target
+    if storage.exists(key):
+        schedule_derivatives(key, [size])
+    return key
+
+def remove_derivatives(key):
+    storage = get_storage()
+    for size in IMAGE_SIZES:
+        storage.delete(derived_key(key, size))
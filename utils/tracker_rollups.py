@@ -0,0 +1,94 @@
+import datetime
+
+# Tracker columns and the rollup column prefix each one is summed into
+METRICS = {'sleep_hours': 'sleep', 'water_intake': 'water', 'steps': 'steps'}
+GRANULARITIES = ('day', 'week', 'month')
+
+def period_start(day, period):
+    if period == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_period(start, period):
+    if period == 'week':
+        return start + datetime.timedelta(days=7)
+    if period == 'month':
+        return (start + datetime.timedelta(days=32)).replace(day=1)
+    return start + datetime.timedelta(days=1)
+
+def period_starts(start, end, period):
+    """Every period start from the one containing `start` through the one containing `end`."""
+    current = period_start(start, period)
+    while current <= end:
+        yield current
+        current = next_period(current, period)
+
+_REFRESH_SQL = """
+    INSERT INTO tracker_rollups (user_id, period, period_start, sleep_total, sleep_days,
+                                 water_total, water_days, steps_total, steps_days)
+    SELECT * FROM (
+        SELECT %s AS user_id, %s AS period, %s AS period_start,
+               COALESCE(SUM(sleep_hours), 0) AS sleep_total, COUNT(sleep_hours) AS sleep_days,
+               COALESCE(SUM(water_intake), 0) AS water_total, COUNT(water_intake) AS water_days,
+               COALESCE(SUM(steps), 0) AS steps_total, COUNT(steps) AS steps_days
+        FROM health_tracking
+        WHERE user_id = %s AND track_date >= %s AND track_date < %s
+    ) AS agg
+    ON DUPLICATE KEY UPDATE
+        sleep_total = agg.sleep_total, sleep_days = agg.sleep_days,
+        water_total = agg.water_total, water_days = agg.water_days,
+        steps_total = agg.steps_total, steps_days = agg.steps_days
+"""
+
+def refresh_rollups(cur, user_id, days):
+    """Recompute the week and month rollups containing `days`.
+
+    Call in the transaction that wrote health_tracking; each period re-reads at
+    most a month of that user's daily rows through the (user_id, track_date) key.
+    """
+    buckets = set()
+    for day in days:
+        if isinstance(day, str):
+            day = datetime.date.fromisoformat(day)
+        for period in ('week', 'month'):
+            buckets.add((period, period_start(day, period)))
+    for period, start in sorted(buckets):
+        cur.execute(_REFRESH_SQL, (user_id, period, start, user_id, start, next_period(start, period)))
+
+def tracker_history(cur, user_id, start, end, granularity):
+    """One point per period in [start, end] (widened to whole periods), gaps included.
+
+    Days come from health_tracking; weeks and months from tracker_rollups.
+    Each metric reports its total, the number of days logged, and the average
+    over those days.
+    """
+    if granularity == 'day':
+        cur.execute("""
+            SELECT track_date AS period_start,
+                   COALESCE(sleep_hours, 0) AS sleep_total, sleep_hours IS NOT NULL AS sleep_days,
+                   COALESCE(water_intake, 0) AS water_total, water_intake IS NOT NULL AS water_days,
+                   COALESCE(steps, 0) AS steps_total, steps IS NOT NULL AS steps_days
+            FROM health_tracking
+            WHERE user_id = %s AND track_date BETWEEN %s AND %s
+        """, (user_id, start, end))
+    else:
+        cur.execute("""
+            SELECT period_start, sleep_total, sleep_days, water_total, water_days, steps_total, steps_days
+            FROM tracker_rollups
+            WHERE user_id = %s AND period = %s AND period_start BETWEEN %s AND %s
+        """, (user_id, granularity, period_start(start, granularity), end))
+    rows = {row['period_start']: row for row in cur.fetchall()}
+
+    points = []
+    for day in period_starts(start, end, granularity):
+        row = rows.get(day)
+        point = {'start': day.isoformat()}
+        for metric, prefix in METRICS.items():
+            total = float(row[f'{prefix}_total']) if row else 0.0
+            logged = int(row[f'{prefix}_days']) if row else 0
+            point[metric] = {'total': total, 'days': logged,
+                             'avg': round(total / logged, 2) if logged else 0.0}
+        points.append(point)
+    return points
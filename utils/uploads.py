@@ -0,0 +1,157 @@
+import hashlib, json, os, shutil, time, uuid
+from werkzeug.utils import secure_filename
+from utils.storage import get_storage, content_key
+
+# Resumable uploads live in <UPLOAD_FOLDER>/_incoming/<upload_id>/ as numbered
+# .part files next to a manifest, so any worker sharing the folder can take
+# the next chunk. Abandoned uploads are swept after STALE_UPLOAD_SECONDS.
+INCOMING_DIR = '_incoming'
+CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 50 * 1024 * 1024))
+# Clients send CHUNK_SIZE chunks, so no upload within the limit needs more
+MAX_CHUNKS = -(-MAX_UPLOAD_BYTES // CHUNK_SIZE)
+STALE_UPLOAD_SECONDS = 24 * 3600
+_COPY_BUFFER = 64 * 1024
+
+def upload_folder():
+    return os.environ.get('UPLOAD_FOLDER', 'uploads')
+
+def _incoming(upload_id=''):
+    return os.path.join(upload_folder(), INCOMING_DIR, upload_id)
+
+def _manifest_path(upload_id):
+    return os.path.join(_incoming(upload_id), 'manifest.json')
+
+def start_upload(user_id, filename, description=''):
+    cleanup_stale_uploads()
+    upload_id = uuid.uuid4().hex
+    os.makedirs(_incoming(upload_id))
+    with open(_manifest_path(upload_id), 'w') as f:
+        json.dump(dict(user_id=int(user_id), filename=secure_filename(filename),
+                       description=description, started=time.time()), f)
+    return upload_id
+
+def load_upload(upload_id, user_id):
+    """The upload's manifest, or None if it doesn't exist or belongs to someone else."""
+    if not upload_id.isalnum():
+        return None
+    try:
+        with open(_manifest_path(upload_id)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('user_id') == int(user_id) else None
+
+def _chunk_path(upload_id, index):
+    return os.path.join(_incoming(upload_id), f"{index:06d}.part")
+
+def _received_bytes(upload_id, skip):
+    total = 0
+    for index in received_chunks(upload_id):
+        if index != skip:
+            try:
+                total += os.path.getsize(_chunk_path(upload_id, index))
+            except OSError:
+                pass
+    return total
+
+def write_chunk(upload_id, index, stream):
+    """Store chunk `index`; re-sending a chunk replaces it. Returns its size.
+
+    Raises ValueError once the chunk, or the upload so far, is over its limit.
+    """
+    target = _chunk_path(upload_id, index)
+    # A unique name per attempt, so a retry racing a slow original can't
+    # interleave writes into the same temp file
+    tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+    limit = min(MAX_CHUNK_BYTES, MAX_UPLOAD_BYTES - _received_bytes(upload_id, skip=index))
+    size = 0
+    with open(tmp, 'wb') as out:
+        while True:
+            block = stream.read(_COPY_BUFFER)
+            if not block:
+                break
+            size += len(block)
+            if size > limit:
+                out.close()
+                os.remove(tmp)
+                if limit < MAX_CHUNK_BYTES:
+                    raise ValueError(f"Upload larger than {MAX_UPLOAD_BYTES} bytes")
+                raise ValueError(f"Chunk larger than {MAX_CHUNK_BYTES} bytes")
+            out.write(block)
+    os.replace(tmp, target)
+    return size
+
+def received_chunks(upload_id):
+    return sorted(int(name[:-5]) for name in os.listdir(_incoming(upload_id)) if name.endswith('.part'))
+
+def _write_hashed(blocks):
+    """Write blocks to a temp file in the upload folder; return (tmp_path, sha256, size)."""
+    os.makedirs(upload_folder(), exist_ok=True)
+    tmp = os.path.join(upload_folder(), f".{uuid.uuid4().hex}.tmp")
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(tmp, 'wb') as out:
+            for block in blocks:
+                size += len(block)
+                if size > MAX_UPLOAD_BYTES:
+                    raise ValueError(f"Upload larger than {MAX_UPLOAD_BYTES} bytes")
+                digest.update(block)
+                out.write(block)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return tmp, digest.hexdigest(), size
+
+def _read_blocks(fh):
+    while True:
+        block = fh.read(_COPY_BUFFER)
+        if not block:
+            return
+        yield block
+
+def assemble_upload(upload_id, total_chunks):
+    """Concatenate chunks 0..total_chunks-1; raises ValueError listing missing chunks."""
+    missing = sorted(set(range(total_chunks)) - set(received_chunks(upload_id)))
+    if missing:
+        raise ValueError(f"Missing chunks: {missing[:20]}")
+    def blocks():
+        for index in range(total_chunks):
+            with open(_chunk_path(upload_id, index), 'rb') as part:
+                yield from _read_blocks(part)
+    return _write_hashed(blocks())
+
+def hash_stream(stream):
+    """Single-request uploads: spool the stream to a temp file while hashing it."""
+    return _write_hashed(_read_blocks(stream))
+
+def store_content(tmp_path, content_hash, filename):
+    """Move a hashed temp file to its content-addressed key.
+
+    Returns (key, created); created is False when identical bytes were already
+    stored (by any user), in which case the temp file is dropped.
+    """
+    storage = get_storage()
+    key = content_key(content_hash, secure_filename(filename))
+    if storage.exists(key):
+        os.remove(tmp_path)
+        return key, False
+    storage.put_file(key, tmp_path)
+    return key, True
+
+def discard_upload(upload_id):
+    shutil.rmtree(_incoming(upload_id), ignore_errors=True)
+
+def cleanup_stale_uploads():
+    root = _incoming()
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - STALE_UPLOAD_SECONDS
+    for upload_id in os.listdir(root):
+        path = os.path.join(root, upload_id)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
@@ -0,0 +1,133 @@
+import datetime, functools, json, os, re, threading
+from collections import OrderedDict
+from utils.recurrence import add_months
+
+# Standard immunization schedule (utils/data/vaccine_schedule.json), compiled
+# once: each vaccine's name pattern becomes a regex that also recognizes the
+# combination products containing it. Free-text child_vaccinations rows are
+# matched against it and counted as doses in date order.
+SCHEDULE_FILE = os.path.join(os.path.dirname(__file__), 'data', 'vaccine_schedule.json')
+DUE_GRACE_DAYS = int(os.environ.get('VACCINE_DUE_GRACE_DAYS', 30))
+UPCOMING_DAYS = int(os.environ.get('VACCINE_UPCOMING_DAYS', 60))
+ACTIONABLE = ('overdue', 'due', 'upcoming')
+STATUS_CACHE_SIZE = int(os.environ.get('VACCINE_STATUS_CACHE_SIZE', 4096))
+
+@functools.lru_cache(maxsize=1)
+def compiled_schedule():
+    """[(code, name, regex, ((age_months, min_interval_days), ...)), ...]"""
+    with open(SCHEDULE_FILE) as f:
+        spec = json.load(f)
+    return tuple(
+        (v['code'], v['name'], re.compile(v['match'], re.IGNORECASE),
+         tuple((d['age_months'], d.get('min_interval_days', 0)) for d in v['doses']))
+        for v in spec['vaccines'])
+
+@functools.lru_cache(maxsize=4096)
+def vaccine_codes(vaccination_name):
+    """Schedule codes a recorded vaccination counts toward (several for combination shots)."""
+    return tuple(code for code, _, pattern, _ in compiled_schedule() if pattern.search(vaccination_name or ''))
+
+def child_schedule(birth_date, received, today):
+    """Every scheduled dose with its due date and status.
+
+    `received` is [(vaccination_name, date_received), ...] in date order. A dose
+    is due at its recommended age, but never sooner than the minimum interval
+    after the previous dose.
+    """
+    given = {}
+    for name, day in received:
+        for code in vaccine_codes(name):
+            if day and day not in given.setdefault(code, []):
+                given[code].append(day)
+
+    doses = []
+    for code, name, _, schedule in compiled_schedule():
+        dates = given.get(code, [])
+        previous = None
+        for n, (age_months, min_interval) in enumerate(schedule):
+            due = add_months(birth_date, age_months)
+            if previous:
+                due = max(due, previous + datetime.timedelta(days=min_interval))
+            received_on = dates[n] if n < len(dates) else None
+            if received_on:
+                status = 'received'
+            elif today > due + datetime.timedelta(days=DUE_GRACE_DAYS):
+                status = 'overdue'
+            elif today >= due:
+                status = 'due'
+            elif due <= today + datetime.timedelta(days=UPCOMING_DAYS):
+                status = 'upcoming'
+            else:
+                status = 'scheduled'
+            doses.append({'vaccine': code, 'name': name, 'dose': n + 1, 'due_date': due.isoformat(),
+                          'status': status, 'received_date': received_on.isoformat() if received_on else None})
+            previous = received_on or due
+    return doses
+
+# ── Per-child cache ──────────────────────────────────────────────────────
+# child_id -> (stamp, doses); the stamp holds the child's vaccinations data
+# version, birth date and today's date, so writes and midnight both miss.
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cached(child_id, stamp):
+    with _cache_lock:
+        entry = _cache.get(child_id)
+        if entry and entry[0] == stamp:
+            _cache.move_to_end(child_id)
+            return entry[1]
+        return None
+
+def _store(child_id, stamp, doses):
+    with _cache_lock:
+        _cache[child_id] = (stamp, doses)
+        _cache.move_to_end(child_id)
+        while len(_cache) > STATUS_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def children_schedules(cur, user_id, child_id=None, statuses=None):
+    """Schedules for all of a user's children (or one), two queries in total.
+
+    The first reads each child with its vaccinations version; only children
+    whose cached result is stale have their vaccination rows loaded, in one
+    set-based query. `statuses` filters the returned doses.
+    """
+    today = datetime.date.today()
+    cur.execute(f"""
+        SELECT c.id, c.full_name, c.birth_date, COALESCE(dv.version, 0) AS version
+        FROM children c
+        LEFT JOIN data_versions dv ON dv.scope = 'vaccinations' AND dv.owner_id = CAST(c.id AS CHAR)
+        WHERE c.user_id = %s {'AND c.id = %s' if child_id else ''}
+        ORDER BY c.id
+    """, (user_id, child_id) if child_id else (user_id,))
+    children = cur.fetchall()
+
+    results, stale = {}, []
+    for child in children:
+        stamp = (child['version'], child['birth_date'], today)
+        doses = _cached(child['id'], stamp)
+        if doses is None:
+            stale.append((child, stamp))
+        else:
+            results[child['id']] = doses
+    if stale:
+        cur.execute(f"""
+            SELECT child_id, vaccination_name, date_received
+            FROM child_vaccinations
+            WHERE child_id IN ({', '.join(['%s'] * len(stale))})
+            ORDER BY child_id, date_received
+        """, tuple(child['id'] for child, _ in stale))
+        received = {}
+        for row in cur.fetchall():
+            received.setdefault(row['child_id'], []).append((row['vaccination_name'], row['date_received']))
+        for child, stamp in stale:
+            doses = child_schedule(child['birth_date'], received.get(child['id'], []), today)
+            _store(child['id'], stamp, doses)
+            results[child['id']] = doses
+
+    return [{
+        'child_id': child['id'],
+        'child_name': child['full_name'],
+        'birth_date': child['birth_date'].isoformat(),
+        'doses': [d for d in results[child['id']] if not statuses or d['status'] in statuses],
+    } for child in children]
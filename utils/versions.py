@@ -0,0 +1,31 @@
+from flask import request
+
+# Scopes and the id they are keyed by
+CHILD_SCOPES = ('baby_growth', 'vaccinations', 'health_records')
+USER_SCOPES = ('calendar', 'media')
+
+def bump_version(cur, scope, owner_id):
+    """Invalidate ETags for a list; call inside the transaction that changes it."""
+    cur.execute("""
+        INSERT INTO data_versions (scope, owner_id, version) VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE version = data_versions.version + 1
+    """, (scope, str(owner_id)))
+
+def get_etag(cur, scope, owner_id):
+    cur.execute("SELECT version FROM data_versions WHERE scope = %s AND owner_id = %s",
+                (scope, str(owner_id)))
+    row = cur.fetchone()
+    version = (row['version'] if isinstance(row, dict) else row[0]) if row else 0
+    return f"{scope}-{owner_id}-{version}"
+
+def is_fresh(etag):
+    """True when the client's If-None-Match already has this version."""
+    return request.if_none_match.contains_weak(etag)
+
+def not_modified(etag):
+    return '', 304, {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response